@@ -0,0 +1,78 @@
+"""
+Server entrypoint: answers /health at once and loads the application behind it.
+
+Importing app.main (FastAPI, SQLAlchemy, pydantic schemas, the routers) takes most
+of a second, which used to be the time from process start to the first health
+check passing. This module imports nothing but the standard library. It starts
+importing app.main in a background thread when the server starts (ASGI lifespan
+startup, or the first request when lifespan is off). /health is answered here
+meanwhile, and every other request waits for the import and is then passed on
+unchanged. A failed import turns /health into a 503 so the instance is replaced.
+
+app.main registers no startup or shutdown handlers; its lifespan is not run.
+"""
+import asyncio
+import importlib
+import json
+import threading
+
+HEALTH_PATH = "/health"
+
+class LazyApp:
+    def __init__(self, target: str = "app.main"):
+        self.target = target
+        self._app = None
+        self._error: BaseException | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+
+    def _import(self):
+        try:
+            self._app = importlib.import_module(self.target).app
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._loaded.set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._import, name="app-import", daemon=True)
+                self._thread.start()
+
+    async def application(self):
+        self.start()
+        if not self._loaded.is_set():
+            await asyncio.to_thread(self._loaded.wait)
+        if self._error is not None:
+            raise RuntimeError(f"{self.target} failed to import") from self._error
+        return self._app
+
+    async def _health(self, send):
+        ok = self._error is None
+        body = json.dumps({"status": "ok" if ok else "error"}).encode()
+        await send({"type": "http.response.start", "status": 200 if ok else 503, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http" and scope["path"] == HEALTH_PATH:
+            await self._health(send)
+        else:
+            await (await self.application())(scope, receive, send)
+
+app = LazyApp()
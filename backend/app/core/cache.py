@@ -0,0 +1,137 @@
+"""
+Read cache shared by all worker processes on a machine.
+
+Entries are JSON files under CACHE_DIR (tmpfs /dev/shm by default), grouped by
+scope, e.g. "model:42" or "trades". Each scope has a version counter; entries
+live under the current version and invalidation bumps it, so a worker that
+loaded stale data concurrently with a write stores it under a version nobody
+reads any more. The version also serves as the scope's ETag component.
+
+The cache is best effort: expired entries are pruned periodically, and a failed
+write (e.g. a full tmpfs) is logged and the freshly loaded value served anyway.
+"""
+import fcntl
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable
+from app.core.settings import settings
+
+log = logging.getLogger(__name__)
+
+class SharedCache:
+    def __init__(self, root: str, ttl_seconds: int):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self._last_prune = time.monotonic()
+
+    def _gen_path(self, scope: str) -> str:
+        return os.path.join(self.root, f"{scope}.gen")
+
+    def _write_atomic(self, path: str, data: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            # Don't leave a partial file behind on a full disk.
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _bump(self, scope: str) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._gen_path(scope), "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            current = f.read().strip()
+            # Start from wall-clock ms so versions keep increasing across clear() on restart.
+            version = int(current) + 1 if current else int(time.time() * 1000)
+            f.seek(0)
+            f.truncate()
+            f.write(str(version))
+            f.flush()
+        return str(version)
+
+    def generation(self, scope: str) -> str:
+        try:
+            with open(self._gen_path(scope)) as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                version = f.read().strip()
+        except FileNotFoundError:
+            version = ""
+        return version or self._bump(scope)
+
+    def _entry_path(self, scope: str, gen: str, key: str) -> str:
+        return os.path.join(self.root, scope, gen, f"{key}.json")
+
+    def get(self, scope: str, key: str, gen: str | None = None) -> Any | None:
+        path = self._entry_path(scope, gen or self.generation(scope), key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def set(self, scope: str, key: str, value: Any, gen: str | None = None):
+        if time.monotonic() - self._last_prune > self.ttl_seconds:
+            self.prune()
+        try:
+            self._write_atomic(self._entry_path(scope, gen or self.generation(scope), key), json.dumps(value, default=str))
+        except OSError as e:
+            log.warning(f"Shared cache write failed for {scope}/{key}: {e}")
+            self.prune()
+
+    def prune(self):
+        """Delete entries older than the TTL; run from set() at most once per TTL per process."""
+        self._last_prune = time.monotonic()
+        cutoff = time.time() - self.ttl_seconds
+        for dirpath, _, filenames in os.walk(self.root, topdown=False):
+            for name in filenames:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+            if dirpath != self.root:
+                try:
+                    os.rmdir(dirpath)
+                except OSError:
+                    pass
+
+    def get_or_load(self, scope: str, key: str, loader: Callable[[], Any], gen: str | None = None) -> Any:
+        gen = gen or self.generation(scope)
+        value = self.get(scope, key, gen)
+        if value is None:
+            value = loader()
+            self.set(scope, key, value, gen)
+        return value
+
+    def invalidate(self, *scopes: str):
+        for scope in scopes:
+            old = self.generation(scope)
+            self._bump(scope)
+            shutil.rmtree(os.path.join(self.root, scope, old), ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+shared_cache = SharedCache(settings.CACHE_DIR, settings.CACHE_TTL_SECONDS)
+
+def model_scope(model_id: int) -> str:
+    return f"model:{model_id}"
+
+def lattice_scope(model_id: int) -> str:
+    """Bumped only when a model's cells or cell capacities change, not on allocation writes."""
+    return f"lattice:{model_id}"
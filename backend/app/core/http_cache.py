@@ -0,0 +1,68 @@
+"""
+Conditional GET support for cached read endpoints.
+
+Responses are keyed by the scope version from the shared cache: the strong ETag
+is derived from it, If-None-Match hits answer 304 without touching the DB, and
+serialized bodies are kept in a per-worker LRU bounded by RESPONSE_CACHE_BYTES.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+from fastapi import Request, Response
+from app.core.cache import shared_cache
+from app.core.settings import settings
+from app.core.tracing import span
+
+class ResponseCache:
+    """LRU of serialized bodies, evicting least recently used entries past a byte budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_BYTES)
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, and compressing proxies weaken our strong tags.
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def cached_json_response(request: Request, scope: str, key: str, loader: Callable[[], Any]) -> Response:
+    """Serve loader()'s JSON for (scope, key), reusing the 304/LRU/shared-cache layers in that order."""
+    version = shared_cache.generation(scope)
+    etag = f'"{scope}-{version}-{key}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    body = response_cache.get(etag)
+    if body is None:
+        value = shared_cache.get_or_load(scope, key, loader, version)
+        with span("serialize_response"):
+            body = json.dumps(value, default=str).encode()
+        response_cache.put(etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
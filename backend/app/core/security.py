@@ -1,3 +1,10 @@
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt
@@ -6,16 +13,73 @@ from app.core.settings import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class HashPoolBusy(Exception):
+    """Raised when AUTH_MAX_PENDING hash operations are already in flight."""
+
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 def hash_password(plain: str) -> str:
     return pwd_context.hash(plain)
 
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(settings.AUTH_MAX_PENDING)
+
+def _hash_pool() -> ProcessPoolExecutor:
+    # Created on first use so each gunicorn worker gets its own pool after fork.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(settings.AUTH_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+async def _offload(fn, *args):
+    """Await a bcrypt call in the hash pool without holding a thread.
+
+    At most AUTH_MAX_PENDING calls are in flight per worker; beyond that HashPoolBusy
+    is raised at once rather than queueing. A slot is freed when the call finishes in
+    the pool, even if the awaiting request was cancelled meanwhile.
+    """
+    if not _pending.acquire(blocking=False):
+        raise HashPoolBusy()
+    try:
+        future = _hash_pool().submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return await asyncio.wrap_future(future)
+
+async def verify_password_offloaded(plain: str, hashed: str) -> bool:
+    return await _offload(verify_password, plain, hashed)
+
+async def hash_password_offloaded(plain: str) -> str:
+    return await _offload(hash_password, plain)
+
 def create_access_token(sub: str, role: str, expires_minutes: int = 60) -> str:
     expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
     payload = {"sub": sub, "role": role, "exp": expire}
     return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
 
+_claims: "OrderedDict[bytes, dict]" = OrderedDict()
+_claims_lock = threading.Lock()
+
 def decode_token(token: str) -> dict:
-    return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    """Verify a JWT, reusing already-verified claims (keyed by token digest) until they expire."""
+    digest = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+    with _claims_lock:
+        claims = _claims.get(digest)
+        if claims is not None:
+            if claims.get("exp", 0) > now:
+                _claims.move_to_end(digest)
+                return dict(claims)
+            del _claims[digest]
+    claims = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    if "exp" in claims:
+        with _claims_lock:
+            _claims[digest] = claims
+            while len(_claims) > settings.AUTH_TOKEN_CACHE_SIZE:
+                _claims.popitem(last=False)
+    return dict(claims)
@@ -1,5 +1,31 @@
+import math
 import os
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+
+def available_cpus(cgroup_root: str = "/sys/fs/cgroup") -> int:
+    """CPUs this process may use: the container's cgroup CPU quota if set, else its affinity mask.
+
+    os.cpu_count() reports the host's cores inside a container.
+    """
+    try:
+        with open(os.path.join(cgroup_root, "cpu.max")) as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_quota_us")) as f:
+            quota = int(f.read())
+        with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_period_us")) as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return max(1, math.ceil(quota / period))
+    except (OSError, ValueError):
+        pass
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
 
 class Settings(BaseModel):
     POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "localhost")
@@ -11,6 +37,24 @@ class Settings(BaseModel):
     JWT_SECRET: str = os.getenv("JWT_SECRET", "change_me")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "https://construction-capacity-manager.vercel.app,http://localhost:5173")
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", str(available_cpus())))
+    DB_MAX_CONNECTIONS: int = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+    DB_RESERVED_CONNECTIONS: int = int(os.getenv("DB_RESERVED_CONNECTIONS", "10"))
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "/dev/shm/cm-cache" if os.path.isdir("/dev/shm") else "/tmp/cm-cache")
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+    RESPONSE_CACHE_BYTES: int = int(os.getenv("RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))
+    AUTH_HASH_WORKERS: int = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+    AUTH_MAX_PENDING: int = int(os.getenv("AUTH_MAX_PENDING", "32"))
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    TRACE_ENABLED: bool = os.getenv("TRACE_ENABLED", "true").lower() in ("1", "true", "yes")
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+    TRACE_SLOW_MS: float = float(os.getenv("TRACE_SLOW_MS", "500"))
+    TRACE_MAX_SPANS: int = int(os.getenv("TRACE_MAX_SPANS", "256"))
+    TRACE_QUEUE_SIZE: int = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))
+    TRACE_DIR: str = os.getenv("TRACE_DIR", "/tmp/cm-traces")
+    TRACE_FILE_MAX_BYTES: int = int(os.getenv("TRACE_FILE_MAX_BYTES", str(64 * 1024 * 1024)))
+    TRACE_EXCLUDE_PATHS: str = os.getenv("TRACE_EXCLUDE_PATHS", "/health,/changes")
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
 
     def db_url(self) -> str:
         if self.DATABASE_URL:
@@ -20,4 +64,25 @@ class Settings(BaseModel):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @model_validator(mode="after")
+    def _check_connection_budget(self) -> "Settings":
+        # Each worker needs its change-feed listener plus at least one pooled connection.
+        if self.WEB_CONCURRENCY < 1 or self._connections_per_worker() < 2:
+            raise ValueError(
+                f"WEB_CONCURRENCY={self.WEB_CONCURRENCY} leaves fewer than 2 of "
+                f"DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS = {self.DB_MAX_CONNECTIONS - self.DB_RESERVED_CONNECTIONS} "
+                f"connections per worker; lower WEB_CONCURRENCY or raise DB_MAX_CONNECTIONS"
+            )
+        return self
+
+    def _connections_per_worker(self) -> int:
+        return (self.DB_MAX_CONNECTIONS - self.DB_RESERVED_CONNECTIONS) // max(1, self.WEB_CONCURRENCY)
+
+    def db_pool_size(self) -> tuple[int, int]:
+        """(pool_size, max_overflow) per worker so all workers together stay under max_connections."""
+        # One connection per worker is held by the change-feed listener.
+        budget = self._connections_per_worker() - 1
+        pool_size = min(5, budget)
+        return pool_size, budget - pool_size
+
 settings = Settings()
@@ -0,0 +1,342 @@
+"""
+Always-on request tracing and opt-in per-request profiling.
+
+TracingMiddleware opens a root span per HTTP request; span() and @traced add
+child spans at the interesting phases (model parsing, voxelization, DB inserts,
+capacity checks, response serialization). Recording a span costs two clock
+reads and a list append, and nothing is recorded outside a request. A finished
+trace is kept when it is sampled (TRACE_SAMPLE_RATE), slower than TRACE_SLOW_MS
+or profiled, and handed to a background thread that appends it to
+TRACE_DIR/traces-<pid>.jsonl as one OTLP/JSON ExportTraceServiceRequest per
+line; when that thread falls behind, traces are dropped rather than queued.
+
+With PROFILING_ENABLED, a request sent with `X-Profile: 1` (or `?profile=1`)
+runs its endpoint under cProfile, or pyinstrument for `X-Profile: pyinstrument`
+when it is installed, and the profile is written next to the traces as
+profiles/<trace-id>.prof or .html. Only one profiler runs per thread: a profiled
+request that overlaps another on the same thread is traced but not profiled
+(profile.skipped). Async endpoints are profiled on the event-loop thread, so their
+profile includes whatever other coroutines ran while they awaited. Every traced
+response carries X-Trace-Id.
+"""
+import asyncio
+import cProfile
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from app.core.settings import settings
+
+SERVICE_NAME = "capacity-manager"
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_ERROR = 2
+
+log = logging.getLogger(__name__)
+
+class Trace:
+    __slots__ = ("trace_id", "spans", "dropped", "profile", "profiler")
+
+    def __init__(self, profile: str | None = None):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans: List["Span"] = []
+        self.dropped = 0
+        self.profile = profile
+        self.profiler: Any = None
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "attributes", "start", "end", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: str | None, attributes: Dict, kind: int = SPAN_KIND_INTERNAL):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start = time.time_ns()
+        self.end = 0
+        self.error = False
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.end = time.time_ns()
+        trace = self.trace
+        if len(trace.spans) < settings.TRACE_MAX_SPANS or self.parent_id is None:
+            trace.spans.append(self)
+        else:
+            trace.dropped += 1
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+class _SpanScope:
+    __slots__ = ("name", "attributes", "span", "token")
+
+    def __init__(self, name: str, attributes: Dict):
+        self.name = name
+        self.attributes = attributes
+        self.span: Span | None = None
+
+    def __enter__(self) -> Span | None:
+        parent = _current.get()
+        if parent is None:
+            return None
+        self.span = Span(parent.trace, self.name, parent.span_id, self.attributes)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        s = self.span
+        if s is None:
+            return False
+        _current.reset(self.token)
+        if exc is not None:
+            s.attributes["exception.type"] = exc_type.__name__
+            # HTTPException 4xx is an expected outcome, not a failed span.
+            s.error = getattr(exc, "status_code", 500) >= 500
+        s.finish()
+        return False
+
+def span(name: str, **attributes) -> _SpanScope:
+    """Child span of the current request's active span; a no-op outside a traced request."""
+    return _SpanScope(name, attributes)
+
+def traced(name: str):
+    """Decorator form of span() for functions that are always one phase."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _start_profiler(mode: str):
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+            p = Profiler(async_mode="disabled")
+            p.start()
+            return p
+        except ImportError:
+            pass
+    p = cProfile.Profile()
+    p.enable()
+    return p
+
+def _stop_profiler(p):
+    if isinstance(p, cProfile.Profile):
+        p.disable()
+    else:
+        p.stop()
+
+# A thread has a single profiling hook, so a second profiler would replace the
+# first one's and the first stop would disable both.
+_profiling = threading.local()
+
+class _Profiled:
+    """Profiles the enclosed code in the calling thread when the current request asked for it."""
+    __slots__ = ("trace",)
+
+    def __enter__(self):
+        s = _current.get()
+        self.trace = s.trace if s and s.trace.profile and s.trace.profiler is None else None
+        if self.trace is None:
+            return
+        if getattr(_profiling, "active", False):
+            s.set("profile.skipped", True)
+            self.trace = None
+            return
+        _profiling.active = True
+        try:
+            self.trace.profiler = _start_profiler(self.trace.profile)
+        except BaseException:
+            _profiling.active = False
+            raise
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.trace is not None:
+            _stop_profiler(self.trace.profiler)
+            _profiling.active = False
+        return False
+
+def _wrap_endpoint(endpoint):
+    # cProfile only sees the thread it was enabled in, and sync endpoints run in the
+    # threadpool, so the profiler is started inside the endpoint call itself.
+    name = endpoint.__name__
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def run_async(*args, **kwargs):
+            with span(name, **{"code.function": endpoint.__qualname__}), _Profiled():
+                return await endpoint(*args, **kwargs)
+        return run_async
+
+    @functools.wraps(endpoint)
+    def run(*args, **kwargs):
+        with span(name, **{"code.function": endpoint.__qualname__}), _Profiled():
+            return endpoint(*args, **kwargs)
+    return run
+
+class TracedRoute(APIRoute):
+    """APIRoute whose endpoint runs in its own span and, for profiled requests, under the profiler."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _wrap_endpoint(endpoint), **kwargs)
+
+class TracedJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with span("serialize_response"):
+            return super().render(content)
+
+def _otlp_value(v: Any) -> Dict:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()]
+
+def to_otlp(trace: Trace) -> Dict:
+    """The trace as an OTLP/JSON ExportTraceServiceRequest."""
+    spans = []
+    for s in trace.spans:
+        out = {
+            "traceId": trace.trace_id, "spanId": s.span_id, "name": s.name, "kind": s.kind,
+            "startTimeUnixNano": str(s.start), "endTimeUnixNano": str(s.end),
+            "attributes": _otlp_attributes(s.attributes),
+        }
+        if s.parent_id:
+            out["parentSpanId"] = s.parent_id
+        if s.error:
+            out["status"] = {"code": STATUS_ERROR}
+        spans.append(out)
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME, "process.pid": os.getpid()})},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+    }]}
+
+class TraceExporter:
+    def __init__(self, directory: str, max_file_bytes: int, queue_size: int):
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, trace: Trace):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        self._queue.join()
+
+    def _ensure_thread(self):
+        # Checked per submit so a worker forked after the first export gets its own thread.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                self.write(trace)
+            except Exception as e:
+                log.warning(f"Dropping trace {trace.trace_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def write(self, trace: Trace):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"traces-{os.getpid()}.jsonl")
+        line = json.dumps(to_otlp(trace), separators=(",", ":")) + "\n"
+        try:
+            if os.path.getsize(path) + len(line) > self.max_file_bytes:
+                os.replace(path, path + ".1")
+        except FileNotFoundError:
+            pass
+        with open(path, "a") as f:
+            f.write(line)
+        if trace.profiler is not None:
+            profiles = os.path.join(self.directory, "profiles")
+            os.makedirs(profiles, exist_ok=True)
+            if isinstance(trace.profiler, cProfile.Profile):
+                trace.profiler.dump_stats(os.path.join(profiles, f"{trace.trace_id}.prof"))
+            else:
+                with open(os.path.join(profiles, f"{trace.trace_id}.html"), "w") as f:
+                    f.write(trace.profiler.output_html())
+
+exporter = TraceExporter(settings.TRACE_DIR, settings.TRACE_FILE_MAX_BYTES, settings.TRACE_QUEUE_SIZE)
+
+_PROFILE_MODES = {"1": "cprofile", "true": "cprofile", "cprofile": "cprofile", "pyinstrument": "pyinstrument"}
+
+def _profile_mode(scope) -> str | None:
+    if not settings.PROFILING_ENABLED:
+        return None
+    for k, v in scope["headers"]:
+        if k == b"x-profile":
+            return _PROFILE_MODES.get(v.decode().lower())
+    qs = scope.get("query_string", b"")
+    if b"profile=" in qs:
+        return _PROFILE_MODES.get(parse_qs(qs.decode()).get("profile", [""])[0].lower())
+    return None
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.excluded = tuple(p.strip() for p in settings.TRACE_EXCLUDE_PATHS.split(",") if p.strip())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.TRACE_ENABLED or scope["path"].startswith(self.excluded):
+            await self.app(scope, receive, send)
+            return
+        trace = Trace(_profile_mode(scope))
+        root = Span(trace, f"{scope['method']} {scope['path']}", None,
+                    {"http.method": scope["method"], "http.target": scope["path"]}, kind=SPAN_KIND_SERVER)
+        status = 500
+
+        async def send_traced(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace.trace_id.encode())]
+            await send(message)
+
+        token = _current.set(root)
+        try:
+            await self.app(scope, receive, send_traced)
+        finally:
+            _current.reset(token)
+            root.set("http.status_code", status)
+            root.error = status >= 500
+            if trace.dropped:
+                root.set("trace.dropped_spans", trace.dropped)
+            root.finish()
+            duration_ms = (root.end - root.start) / 1e6
+            if (trace.profile or random.random() < settings.TRACE_SAMPLE_RATE
+                    or (settings.TRACE_SLOW_MS > 0 and duration_ms >= settings.TRACE_SLOW_MS)):
+                exporter.submit(trace)
@@ -0,0 +1,68 @@
+"""
+Per-model partition maintenance (see db/partitioning.sql).
+
+When the database has been partitioned, finished projects and deleted models are
+removed by detaching their partitions, which takes the same time whatever their
+size, instead of a cascading delete through the shared tables. Without
+partitioning the callers fall back to ordinary deletes.
+
+Also runnable as a script:
+    python -m app.db.partitions archive <project_id>
+    python -m app.db.partitions drop <project_id>
+    python -m app.db.partitions add-years <model_id> <from_year> <to_year>
+"""
+import sys
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+def is_partitioned(db: Session) -> bool:
+    return bool(db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('grid_cells'))"
+    )).scalar())
+
+def detach_project(db: Session, project_id: int, keep: bool) -> List[int]:
+    """Detach all partitions of a project's models and delete the project; returns the model ids.
+
+    With keep the partitions move to the archive schema together with copies of the
+    project and model rows, otherwise they are dropped. The caller commits.
+    """
+    return [r[0] for r in db.execute(
+        text("SELECT cm_detach_project(:pid, :keep)"), {"pid": project_id, "keep": keep}
+    )]
+
+def drop_model_partitions(db: Session, model_id: int):
+    db.execute(text("SELECT cm_detach_model(:mid, false)"), {"mid": model_id})
+
+def add_allocation_years(db: Session, model_id: int, from_year: int, to_year: int):
+    """Create yearly allocation partitions, moving matching rows out of the model's default partition."""
+    db.execute(text("SELECT cm_create_model_partitions(:mid, :from_year, :to_year)"),
+               {"mid": model_id, "from_year": from_year, "to_year": to_year})
+
+def main(argv: List[str]):
+    from app.core.cache import shared_cache, model_scope, lattice_scope
+    from app.db.session import SessionLocal
+
+    usage = "usage: python -m app.db.partitions archive|drop <project_id> | add-years <model_id> <from_year> <to_year>"
+    if len(argv) < 2 or argv[0] not in ("archive", "drop", "add-years"):
+        raise SystemExit(usage)
+    db = SessionLocal()
+    try:
+        if not is_partitioned(db):
+            raise SystemExit("Database is not partitioned; run db/partitioning.sql first")
+        if argv[0] == "add-years":
+            if len(argv) != 4:
+                raise SystemExit(usage)
+            add_allocation_years(db, int(argv[1]), int(argv[2]), int(argv[3]))
+            db.commit()
+            print(f"Model {argv[1]}: allocation partitions for {argv[2]}-{argv[3]}")
+            return
+        model_ids = detach_project(db, int(argv[1]), keep=argv[0] == "archive")
+        db.commit()
+        shared_cache.invalidate("models", *[s for mid in model_ids for s in (model_scope(mid), lattice_scope(mid))])
+        print(f"Project {argv[1]}: {'archived' if argv[0] == 'archive' else 'dropped'} models {model_ids}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -2,5 +2,6 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.settings import settings
 
-engine = create_engine(settings.db_url(), pool_pre_ping=True, future=True)
+pool_size, max_overflow = settings.db_pool_size()
+engine = create_engine(settings.db_url(), pool_pre_ping=True, pool_size=pool_size, max_overflow=max_overflow, future=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
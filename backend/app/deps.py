@@ -14,10 +14,7 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(authorization: Annotated[str | None, Header()] = None, db: Session = Depends(get_db)) -> User:
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing token")
-    token = authorization.split()[1]
+def user_from_token(token: str, db: Session) -> User:
     try:
         payload = decode_token(token)
         username: str = payload.get("sub")
@@ -31,6 +28,24 @@ def get_current_user(authorization: Annotated[str | None, Header()] = None, db:
     except JWTError:
         raise HTTPException(status_code=401, detail="Token decode failed")
 
+def get_current_user(authorization: Annotated[str | None, Header()] = None, db: Session = Depends(get_db)) -> User:
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Missing token")
+    return user_from_token(authorization.split()[1], db)
+
+def get_stream_user(token: str | None = None, authorization: Annotated[str | None, Header()] = None) -> User:
+    """Like get_current_user, but also accepts ?token= since EventSource cannot send headers.
+
+    Uses its own short-lived session so a long-lived stream does not pin a pooled connection.
+    """
+    db = SessionLocal()
+    try:
+        if token:
+            return user_from_token(token, db)
+        return get_current_user(authorization, db)
+    finally:
+        db.close()
+
 def require_role(*roles: str):
     def dependency(user: User = Depends(get_current_user)) -> User:
         if user.role not in roles:
@@ -1,9 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.settings import settings
-from app.routers import auth, projects, models, grid, trades, capacities, allocations, users
+from app.core.tracing import TracedJSONResponse, TracingMiddleware
+from app.routers import auth, projects, models, grid, trades, capacities, allocations, users, scenarios, changes, bulk
 
-app = FastAPI(title="3D Construction Capacity Manager", version="1.0.0")
+app = FastAPI(title="3D Construction Capacity Manager", version="1.0.0", default_response_class=TracedJSONResponse)
 
 origins = [o.strip() for o in settings.CORS_ORIGINS.split(",") if o.strip()]
 app.add_middleware(
@@ -12,7 +13,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Trace-Id"],
 )
+app.add_middleware(TracingMiddleware)
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(users.router, prefix="/users", tags=["users"])
@@ -22,6 +25,9 @@ app.include_router(grid.router, prefix="/grid", tags=["grid"])
 app.include_router(trades.router, prefix="/trades", tags=["trades"])
 app.include_router(capacities.router, prefix="/capacities", tags=["capacities"])
 app.include_router(allocations.router, prefix="/allocations", tags=["allocations"])
+app.include_router(scenarios.router, prefix="/scenarios", tags=["scenarios"])
+app.include_router(changes.router, prefix="/changes", tags=["changes"])
+app.include_router(bulk.router, prefix="/bulk", tags=["bulk"])
 
 @app.get("/health")
 def health():
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, TIMESTAMP, CheckConstraint
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, TIMESTAMP, CheckConstraint, Index, event, select
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
-from geoalchemy2 import Geometry
 from app.models.base import Base
+from app.models.types import Polygon
 from datetime import date
 
 class Project(Base):
@@ -33,6 +33,7 @@ class Model(Base):
 
 class GridCell(Base):
     __tablename__ = "grid_cells"
+    __table_args__ = (Index("grid_cells_footprint_idx", "footprint", postgresql_using="gist"),)
     id: Mapped[int] = mapped_column(primary_key=True)
     model_id: Mapped[int] = mapped_column(ForeignKey("models.id"))
     x_index: Mapped[int]
@@ -45,7 +46,7 @@ class GridCell(Base):
     min_z: Mapped[float]
     max_z: Mapped[float]
     total_capacity: Mapped[int]
-    footprint = Column(Geometry(geometry_type="POLYGON", srid=3857))
+    footprint = Column(Polygon(srid=3857))
     model = relationship("Model", back_populates="grid_cells")
     trade_caps = relationship("TradeCapacity", back_populates="grid_cell", cascade="all, delete-orphan")
     allocations = relationship("Allocation", back_populates="grid_cell", cascade="all, delete-orphan")
@@ -60,6 +61,7 @@ class Trade(Base):
 class TradeCapacity(Base):
     __tablename__ = "trade_capacities"
     id: Mapped[int] = mapped_column(primary_key=True)
+    model_id: Mapped[int] = mapped_column(ForeignKey("models.id"))
     gridcell_id: Mapped[int] = mapped_column(ForeignKey("grid_cells.id"))
     trade_id: Mapped[int] = mapped_column(ForeignKey("trades.id"))
     max_workers: Mapped[int]
@@ -78,6 +80,8 @@ class User(Base):
 class Allocation(Base):
     __tablename__ = "allocations"
     id: Mapped[int] = mapped_column(primary_key=True)
+    # Denormalized from grid_cells: the partition key, and lets per-model queries skip other models' rows.
+    model_id: Mapped[int] = mapped_column(ForeignKey("models.id"))
     gridcell_id: Mapped[int] = mapped_column(ForeignKey("grid_cells.id"))
     trade_id: Mapped[int] = mapped_column(ForeignKey("trades.id"))
     work_date: Mapped[date]
@@ -89,3 +93,46 @@ class Allocation(Base):
     grid_cell = relationship("GridCell", back_populates="allocations")
     trade = relationship("Trade", back_populates="allocations")
     creator = relationship("User", back_populates="allocations")
+
+class Scenario(Base):
+    __tablename__ = "scenarios"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    model_id: Mapped[int] = mapped_column(ForeignKey("models.id"))
+    name: Mapped[str]
+    description: Mapped[str | None]
+    created_by: Mapped[int | None] = mapped_column(ForeignKey("users.id"))
+    created_at: Mapped[str] = mapped_column(TIMESTAMP, server_default=func.now())
+    allocations = relationship("ScenarioAllocation", back_populates="scenario", cascade="all, delete-orphan")
+    capacities = relationship("ScenarioCapacity", back_populates="scenario", cascade="all, delete-orphan")
+
+class ScenarioAllocation(Base):
+    """Overlay row: op='add' carries a new allocation, op='remove' hides base allocation base_allocation_id."""
+    __tablename__ = "scenario_allocations"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    scenario_id: Mapped[int] = mapped_column(ForeignKey("scenarios.id"))
+    op: Mapped[str] = mapped_column(CheckConstraint("op in ('add','remove')"))
+    base_allocation_id: Mapped[int | None] = mapped_column(ForeignKey("allocations.id", ondelete="CASCADE"))
+    gridcell_id: Mapped[int | None] = mapped_column(ForeignKey("grid_cells.id"))
+    trade_id: Mapped[int | None] = mapped_column(ForeignKey("trades.id"))
+    work_date: Mapped[date | None]
+    end_date: Mapped[date | None]
+    num_workers: Mapped[int | None]
+    description: Mapped[str | None]
+    scenario = relationship("Scenario", back_populates="allocations")
+
+class ScenarioCapacity(Base):
+    """Capacity override: trade_id NULL overrides the cell's total_capacity, otherwise the trade's max_workers."""
+    __tablename__ = "scenario_capacities"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    scenario_id: Mapped[int] = mapped_column(ForeignKey("scenarios.id"))
+    gridcell_id: Mapped[int] = mapped_column(ForeignKey("grid_cells.id"))
+    trade_id: Mapped[int | None] = mapped_column(ForeignKey("trades.id"))
+    capacity: Mapped[int]
+    scenario = relationship("Scenario", back_populates="capacities")
+
+@event.listens_for(TradeCapacity, "before_insert")
+@event.listens_for(Allocation, "before_insert")
+def _fill_model_id(mapper, connection, target):
+    """model_id is denormalized from the grid cell; fill it in when the caller left it out."""
+    if target.model_id is None and target.gridcell_id is not None:
+        target.model_id = connection.scalar(select(GridCell.model_id).where(GridCell.id == target.gridcell_id))
@@ -0,0 +1,28 @@
+from sqlalchemy import func
+from sqlalchemy.types import UserDefinedType
+
+class Polygon(UserDefinedType):
+    """PostGIS polygon column exchanged as EWKT text.
+
+    Stands in for geoalchemy2's Geometry so that importing the models does not
+    pull in geoalchemy2, shapely and numpy on every process start.
+    """
+    cache_ok = True
+
+    def __init__(self, srid: int = 3857):
+        self.srid = srid
+
+    def get_col_spec(self, **kw):
+        return f"geometry(POLYGON, {self.srid})"
+
+    def bind_expression(self, bindvalue):
+        return func.ST_GeomFromEWKT(bindvalue, type_=self)
+
+    def column_expression(self, col):
+        return func.ST_AsEWKT(col, type_=self)
+
+def box_ewkt(min_x: float, min_y: float, max_x: float, max_y: float, srid: int = 3857) -> str:
+    return (
+        f"SRID={srid};POLYGON(({min_x} {min_y},{max_x} {min_y},{max_x} {max_y},"
+        f"{min_x} {max_y},{min_x} {min_y}))"
+    )
@@ -1,28 +1,39 @@
 from datetime import date
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from app.core.cache import shared_cache, model_scope
+from app.core.tracing import TracedRoute, span
 from app.deps import get_db, get_current_user, require_role
-from app.models.entities import Allocation
+from app.models.entities import Allocation, GridCell
 from app.schemas.schemas import AllocationCreate, AllocationOut
+from app.services.change_feed import publish, allocation_event
 from app.services.grid_service import capacity_check
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("", response_model=AllocationOut, dependencies=[Depends(require_role("admin","trade_manager"))])
 def create_allocation(payload: AllocationCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
     start = payload.work_date
     end = payload.end_date or payload.work_date
     new_workers = payload.num_workers or 1
+    model_id = db.query(GridCell.model_id).filter(GridCell.id == payload.gridcell_id).scalar()
     ok, reason = capacity_check(db, payload.gridcell_id, payload.trade_id, start, end, new_workers)
     if not ok:
         raise HTTPException(status_code=400, detail=reason)
-    a = Allocation(**payload.model_dump(), created_by=user.id)
-    db.add(a); db.commit(); db.refresh(a)
+    with span("db_insert", rows=1):
+        a = Allocation(**payload.model_dump(), model_id=model_id, created_by=user.id)
+        db.add(a); db.flush()
+        publish(db, model_id, allocation_event("allocation_created", a))
+        db.commit(); db.refresh(a)
+    shared_cache.invalidate(model_scope(model_id))
     return AllocationOut(**payload.model_dump(), id=a.id, created_by=user.id)
 
 @router.get("/by-date/{work_date}", response_model=list[AllocationOut])
-def list_by_date(work_date: date, db: Session = Depends(get_db)):
-    allocs = db.query(Allocation).filter(Allocation.work_date <= work_date, (Allocation.end_date == None) | (Allocation.end_date >= work_date)).all()
+def list_by_date(work_date: date, model_id: int | None = None, db: Session = Depends(get_db)):
+    q = db.query(Allocation).filter(Allocation.work_date <= work_date, (Allocation.end_date == None) | (Allocation.end_date >= work_date))
+    if model_id is not None:
+        q = q.filter(Allocation.model_id == model_id)
+    allocs = q.all()
     return [AllocationOut(
         id=a.id, gridcell_id=a.gridcell_id, trade_id=a.trade_id, work_date=a.work_date, end_date=a.end_date,
         num_workers=a.num_workers, description=a.description, created_by=a.created_by
@@ -33,5 +44,8 @@ def delete_allocation(allocation_id: int, db: Session = Depends(get_db)):
     a = db.query(Allocation).get(allocation_id)
     if not a:
         raise HTTPException(status_code=404, detail="Not found")
+    model_id = a.model_id
+    publish(db, model_id, allocation_event("allocation_deleted", a))
     db.delete(a); db.commit()
+    shared_cache.invalidate(model_scope(model_id))
     return {"deleted": allocation_id}
@@ -1,24 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app.core.security import verify_password, create_access_token
-from app.db.session import SessionLocal
+from app.core.security import HashPoolBusy, verify_password_offloaded, create_access_token
+from app.core.tracing import TracedRoute
+from app.deps import get_db
 from app.models.entities import User
 from app.schemas.schemas import Token
 
-router = APIRouter()
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("/login", response_model=Token)
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form.username).first()
-    if not user or not verify_password(form.password, user.password_hash):
+async def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    # Async so a login waiting on bcrypt holds no threadpool thread; the DB calls still run there.
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.username == form.username).first())
+    # Return the pooled connection before the slow bcrypt check; user's columns are already loaded.
+    await run_in_threadpool(db.close)
+    try:
+        valid = user is not None and await verify_password_offloaded(form.password, user.password_hash)
+    except HashPoolBusy:
+        raise HTTPException(status_code=503, detail="Too many concurrent logins, retry shortly", headers={"Retry-After": "1"})
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token = create_access_token(sub=user.username, role=user.role)
     return Token(access_token=token)
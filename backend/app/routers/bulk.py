@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.core.cache import shared_cache, model_scope, lattice_scope
+from app.core.tracing import TracedRoute
+from app.deps import get_db, get_current_user, require_role
+from app.models.entities import Model
+from app.services.bulk_service import (
+    BulkImportError, EXPORTS, file_format, import_allocations, import_trade_capacities,
+    import_cell_capacities, export_csv, export_parquet,
+)
+from app.services.change_feed import publish
+
+router = APIRouter(route_class=TracedRoute)
+
+def _run_import(db: Session, model_id: int, file: UploadFile, importer, kind: str):
+    if not db.query(Model).get(model_id):
+        raise HTTPException(status_code=404, detail="Model not found")
+    try:
+        fmt = file_format(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        result = importer(file.file, fmt)
+        publish(db, model_id, {"type": "bulk_import", "kind": kind, "rows": result["imported"]})
+        db.commit()
+    except BulkImportError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail={"message": str(e), "errors": e.errors})
+    except Exception:
+        db.rollback()
+        raise
+    shared_cache.invalidate(model_scope(model_id), lattice_scope(model_id))
+    return result
+
+@router.post("/{model_id}/allocations", response_model=dict, dependencies=[Depends(require_role("admin","trade_manager"))])
+def bulk_import_allocations(
+    model_id: int,
+    file: UploadFile = File(...),
+    reject_over_capacity: bool = False,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    return _run_import(db, model_id, file, lambda f, fmt: import_allocations(db, model_id, f, fmt, user.id, reject_over_capacity), "allocations")
+
+@router.post("/{model_id}/trade-capacities", response_model=dict, dependencies=[Depends(require_role("admin"))])
+def bulk_import_trade_capacities(model_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)):
+    return _run_import(db, model_id, file, lambda f, fmt: import_trade_capacities(db, model_id, f, fmt), "trade-capacities")
+
+@router.post("/{model_id}/cell-capacities", response_model=dict, dependencies=[Depends(require_role("admin"))])
+def bulk_import_cell_capacities(model_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)):
+    return _run_import(db, model_id, file, lambda f, fmt: import_cell_capacities(db, model_id, f, fmt), "cell-capacities")
+
+@router.get("/{model_id}/{kind}.{fmt}")
+def bulk_export(model_id: int, kind: str, fmt: str, db: Session = Depends(get_db)):
+    if kind not in EXPORTS or fmt not in ("csv", "parquet"):
+        raise HTTPException(status_code=404, detail="Not found")
+    body = export_csv(db, kind, model_id) if fmt == "csv" else export_parquet(db, kind, model_id)
+    media_type = "text/csv" if fmt == "csv" else "application/vnd.apache.parquet"
+    return StreamingResponse(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="model-{model_id}-{kind}.{fmt}"'
+    })
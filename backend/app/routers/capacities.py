@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from app.core.cache import shared_cache, model_scope, lattice_scope
+from app.core.tracing import TracedRoute
 from app.deps import get_db, require_role
 from app.models.entities import GridCell, TradeCapacity
+from app.services.change_feed import publish
 from app.schemas.schemas import TradeCapacityCreate, TradeCapacityOut, CellCapacityUpdate
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.patch("/cell/{cell_id}", response_model=dict, dependencies=[Depends(require_role("admin"))])
 def update_cell_capacity(cell_id: int, payload: CellCapacityUpdate, db: Session = Depends(get_db)):
@@ -12,18 +15,26 @@ def update_cell_capacity(cell_id: int, payload: CellCapacityUpdate, db: Session
     if not c:
         raise HTTPException(status_code=404, detail="Cell not found")
     c.total_capacity = payload.total_capacity
+    publish(db, c.model_id, {"type": "cell_capacity_changed", "gridcell_id": c.id, "total_capacity": c.total_capacity})
     db.commit()
+    shared_cache.invalidate(model_scope(c.model_id), lattice_scope(c.model_id))
     return {"id": c.id, "total_capacity": c.total_capacity}
 
 @router.post("/trade", response_model=TradeCapacityOut, dependencies=[Depends(require_role("admin"))])
 def upsert_trade_capacity(payload: TradeCapacityCreate, db: Session = Depends(get_db)):
+    model_id = db.query(GridCell.model_id).filter(GridCell.id == payload.gridcell_id).scalar()
     tc = db.query(TradeCapacity).filter(
-        TradeCapacity.gridcell_id == payload.gridcell_id, TradeCapacity.trade_id == payload.trade_id
+        TradeCapacity.model_id == model_id, TradeCapacity.gridcell_id == payload.gridcell_id, TradeCapacity.trade_id == payload.trade_id
     ).first()
     if tc:
         tc.max_workers = payload.max_workers
+        publish(db, model_id, {"type": "trade_capacity_changed", **payload.model_dump()})
         db.commit(); db.refresh(tc)
+        shared_cache.invalidate(model_scope(model_id))
         return TradeCapacityOut(id=tc.id, gridcell_id=tc.gridcell_id, trade_id=tc.trade_id, max_workers=tc.max_workers)
-    tc = TradeCapacity(**payload.model_dump())
-    db.add(tc); db.commit(); db.refresh(tc)
+    tc = TradeCapacity(**payload.model_dump(), model_id=model_id)
+    db.add(tc)
+    publish(db, model_id, {"type": "trade_capacity_changed", **payload.model_dump()})
+    db.commit(); db.refresh(tc)
+    shared_cache.invalidate(model_scope(model_id))
     return TradeCapacityOut(id=tc.id, gridcell_id=tc.gridcell_id, trade_id=tc.trade_id, max_workers=tc.max_workers)
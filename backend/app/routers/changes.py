@@ -0,0 +1,36 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from app.core.tracing import TracedRoute
+from app.deps import get_stream_user
+from app.services.change_feed import change_feed
+
+router = APIRouter(route_class=TracedRoute)
+
+KEEPALIVE_SECONDS = 15
+
+@router.get("/{model_id}", dependencies=[Depends(get_stream_user)])
+async def stream_changes(model_id: int, request: Request):
+    """Server-Sent Events stream of allocation and capacity deltas for one model.
+
+    Every stream opens with a resync, so a client that (re)connects refetches whatever
+    changed before it subscribed or while it was disconnected.
+    """
+    q = change_feed.subscribe(model_id)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            yield f"event: resync\ndata: {json.dumps({'model_id': model_id, 'type': 'resync'})}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(q.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            change_feed.unsubscribe(model_id, q)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
+from app.core.cache import shared_cache, model_scope, lattice_scope
+from app.core.http_cache import cached_json_response
+from app.core.tracing import TracedRoute
 from app.deps import get_db, require_role
 from app.models.entities import Model, GridCell
-from app.schemas.schemas import GridGenRequest, GridCellOut
+from app.schemas.schemas import GridGenRequest, GridCellOut, CellUtilizationOut, LatticeCellOut, ZoneUtilizationOut
+from app.services.change_feed import publish
 from app.services.grid_service import generate_grid
+from app.services.scenario_service import cell_utilization
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("/generate", response_model=list[GridCellOut], dependencies=[Depends(require_role("admin"))])
 def generate(payload: GridGenRequest, db: Session = Depends(get_db)):
@@ -13,6 +19,9 @@ def generate(payload: GridGenRequest, db: Session = Depends(get_db)):
     if not m:
         raise HTTPException(status_code=404, detail="Model not found")
     cells = generate_grid(db, m, payload.sections_x, payload.sections_y, payload.sections_z, payload.default_capacity)
+    publish(db, m.id, {"type": "grid_regenerated", "cells": len(cells)})
+    db.commit()
+    shared_cache.invalidate(model_scope(m.id), lattice_scope(m.id))
     return [
         GridCellOut(
             id=c.id, model_id=c.model_id, x_index=c.x_index, y_index=c.y_index, z_index=c.z_index,
@@ -22,12 +31,46 @@ def generate(payload: GridGenRequest, db: Session = Depends(get_db)):
     ]
 
 @router.get("/{model_id}", response_model=list[GridCellOut])
-def list_cells(model_id: int, db: Session = Depends(get_db)):
-    cells = db.query(GridCell).filter(GridCell.model_id == model_id).all()
-    return [
-        GridCellOut(
-            id=c.id, model_id=c.model_id, x_index=c.x_index, y_index=c.y_index, z_index=c.z_index,
-            min_x=c.min_x, max_x=c.max_x, min_y=c.min_y, max_y=c.max_y, min_z=c.min_z, max_z=c.max_z,
-            total_capacity=c.total_capacity
-        ) for c in cells
-    ]
+def list_cells(model_id: int, request: Request, db: Session = Depends(get_db)):
+    def load():
+        cells = db.query(GridCell).filter(GridCell.model_id == model_id).all()
+        return [
+            GridCellOut(
+                id=c.id, model_id=c.model_id, x_index=c.x_index, y_index=c.y_index, z_index=c.z_index,
+                min_x=c.min_x, max_x=c.max_x, min_y=c.min_y, max_y=c.max_y, min_z=c.min_z, max_z=c.max_z,
+                total_capacity=c.total_capacity
+            ).model_dump() for c in cells
+        ]
+    return cached_json_response(request, model_scope(model_id), "grid", load)
+
+@router.get("/{model_id}/utilization/{work_date}", response_model=list[CellUtilizationOut])
+def utilization(model_id: int, work_date: date, request: Request, db: Session = Depends(get_db)):
+    return cached_json_response(
+        request, model_scope(model_id), f"utilization:{work_date.isoformat()}",
+        lambda: cell_utilization(db, model_id, work_date),
+    )
+
+# The lattice index pulls in numpy, so it is imported on first use rather than at startup.
+
+@router.get("/{model_id}/lookup", response_model=LatticeCellOut)
+def lookup_cell(model_id: int, x: int, y: int, z: int, db: Session = Depends(get_db)):
+    from app.services.lattice_index import get_lattice
+    lattice = get_lattice(db, model_id)
+    cid = lattice.cell_id(x, y, z)
+    if cid is None:
+        raise HTTPException(status_code=404, detail="Cell not found")
+    return LatticeCellOut(id=cid, x_index=x, y_index=y, z_index=z, total_capacity=int(lattice.capacity[x, y, z]))
+
+@router.get("/{model_id}/neighbours", response_model=list[LatticeCellOut])
+def neighbours(model_id: int, x: int, y: int, z: int, diagonal: bool = False, db: Session = Depends(get_db)):
+    from app.services.lattice_index import get_lattice
+    return get_lattice(db, model_id).neighbours(x, y, z, diagonal)
+
+@router.get("/{model_id}/zone", response_model=ZoneUtilizationOut)
+def zone(
+    model_id: int, x0: int, x1: int, y0: int, y1: int, z0: int, z1: int, work_date: date,
+    new_workers: int = 0, db: Session = Depends(get_db),
+):
+    """Capacity check for a whole box of cells: one allocation query plus array slicing."""
+    from app.services.lattice_index import get_lattice
+    return get_lattice(db, model_id).zone_utilization(db, (x0, x1, y0, y1, z0, z1), work_date, new_workers)
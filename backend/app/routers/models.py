@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
 from sqlalchemy.orm import Session
+from app.core.cache import shared_cache, model_scope
+from app.core.http_cache import cached_json_response
+from app.core.tracing import TracedRoute
+from app.db.partitions import is_partitioned, drop_model_partitions
 from app.deps import get_db, require_role
 from app.models.entities import Model, Project
 from app.schemas.schemas import ModelCreate, ModelOut
@@ -8,10 +12,9 @@ from app.services.model_parser import parse_3d_model
 import os
 import uuid
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 UPLOAD_DIR = "/app/uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @router.post("", response_model=ModelOut, dependencies=[Depends(require_role("admin"))])
 def create_model(payload: ModelCreate, db: Session = Depends(get_db)):
@@ -32,6 +35,7 @@ def create_model(payload: ModelCreate, db: Session = Depends(get_db)):
         max_z=payload.max_z if payload.max_z is not None else bounds.max_z,
     )
     db.add(m); db.commit(); db.refresh(m)
+    shared_cache.invalidate("models")
     return ModelOut(**{
         "id": m.id, "project_id": m.project_id, "name": m.name, "format": m.format,
         "model_file_path": m.model_file_path, "min_x": m.min_x, "max_x": m.max_x,
@@ -39,13 +43,14 @@ def create_model(payload: ModelCreate, db: Session = Depends(get_db)):
     })
 
 @router.get("", response_model=list[ModelOut])
-def list_models(db: Session = Depends(get_db)):
-    ms = db.query(Model).all()
-    return [ModelOut(**{
-        "id": m.id, "project_id": m.project_id, "name": m.name, "format": m.format,
-        "model_file_path": m.model_file_path, "min_x": m.min_x, "max_x": m.max_x,
-        "min_y": m.min_y, "max_y": m.max_y, "min_z": m.min_z, "max_z": m.max_z
-    }) for m in ms]
+def list_models(request: Request, db: Session = Depends(get_db)):
+    def load():
+        return [ModelOut(**{
+            "id": m.id, "project_id": m.project_id, "name": m.name, "format": m.format,
+            "model_file_path": m.model_file_path, "min_x": m.min_x, "max_x": m.max_x,
+            "min_y": m.min_y, "max_y": m.max_y, "min_z": m.min_z, "max_z": m.max_z
+        }).model_dump() for m in db.query(Model).all()]
+    return cached_json_response(request, "models", "list", load)
 
 @router.post("/upload", response_model=ModelOut, dependencies=[Depends(require_role("admin"))])
 async def upload_model(
@@ -110,6 +115,7 @@ async def upload_model(
     db.add(m)
     db.commit()
     db.refresh(m)
+    shared_cache.invalidate("models")
 
     return ModelOut(**{
         "id": m.id, "project_id": m.project_id, "name": m.name, "format": m.format,
@@ -135,6 +141,9 @@ def delete_model(model_id: int, db: Session = Depends(get_db)):
             # Remove single file (old structure)
             os.remove(m.model_file_path)
 
+    if is_partitioned(db):
+        drop_model_partitions(db, model_id)
     db.delete(m)
     db.commit()
+    shared_cache.invalidate(model_scope(model_id), "models")
     return {"deleted": model_id}
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from app.core.cache import shared_cache, model_scope, lattice_scope
+from app.core.tracing import TracedRoute
+from app.db.partitions import is_partitioned, detach_project
 from app.deps import get_db, require_role
 from app.models.entities import Project
 from app.schemas.schemas import ProjectCreate, ProjectOut
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("", response_model=ProjectOut, dependencies=[Depends(require_role("admin"))])
 def create_project(payload: ProjectCreate, db: Session = Depends(get_db)):
@@ -33,6 +36,23 @@ def delete_project(project_id: int, db: Session = Depends(get_db)):
     p = db.query(Project).get(project_id)
     if not p:
         raise HTTPException(status_code=404, detail="Project not found")
-    db.delete(p)
+    if is_partitioned(db):
+        model_ids = detach_project(db, project_id, keep=False)
+    else:
+        model_ids = [m.id for m in p.models]
+        db.delete(p)
     db.commit()
+    shared_cache.invalidate("models", *[s for mid in model_ids for s in (model_scope(mid), lattice_scope(mid))])
     return {"deleted": project_id}
+
+@router.post("/{project_id}/archive", response_model=dict, dependencies=[Depends(require_role("admin"))])
+def archive_project(project_id: int, db: Session = Depends(get_db)):
+    """Move a finished project's partitions to the archive schema and remove it from the live tables."""
+    if not db.query(Project).get(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not is_partitioned(db):
+        raise HTTPException(status_code=409, detail="Archiving requires a partitioned database (db/partitioning.sql)")
+    model_ids = detach_project(db, project_id, keep=True)
+    db.commit()
+    shared_cache.invalidate("models", *[s for mid in model_ids for s in (model_scope(mid), lattice_scope(mid))])
+    return {"archived": project_id, "models": model_ids}
@@ -0,0 +1,129 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.core.cache import shared_cache, model_scope, lattice_scope
+from app.core.tracing import TracedRoute
+from app.deps import get_db, get_current_user, require_role
+from app.models.entities import Allocation, GridCell, Model, Scenario, ScenarioAllocation, ScenarioCapacity
+from app.schemas.schemas import (
+    AllocationCreate, ScenarioCreate, ScenarioOut, ScenarioAllocationOut,
+    ScenarioCapacityUpdate, ScenarioCapacityOut, CellUtilizationOut, CellUtilizationDiff,
+)
+from app.services.scenario_service import scenario_capacity_check, cell_utilization, utilization_diff, promote_scenario
+
+router = APIRouter(route_class=TracedRoute)
+
+def _get_scenario(db: Session, scenario_id: int) -> Scenario:
+    s = db.query(Scenario).get(scenario_id)
+    if not s:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    return s
+
+def _check_cell(db: Session, s: Scenario, gridcell_id: int):
+    cell = db.query(GridCell).get(gridcell_id)
+    if not cell or cell.model_id != s.model_id:
+        raise HTTPException(status_code=404, detail="Cell not found in scenario model")
+
+def _overlay_out(o: ScenarioAllocation, warning: str | None = None) -> ScenarioAllocationOut:
+    return ScenarioAllocationOut(
+        id=o.id, scenario_id=o.scenario_id, op=o.op, base_allocation_id=o.base_allocation_id,
+        gridcell_id=o.gridcell_id, trade_id=o.trade_id, work_date=o.work_date, end_date=o.end_date,
+        num_workers=o.num_workers, description=o.description, warning=warning
+    )
+
+@router.post("", response_model=ScenarioOut, dependencies=[Depends(require_role("admin","trade_manager"))])
+def create_scenario(payload: ScenarioCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    if not db.query(Model).get(payload.model_id):
+        raise HTTPException(status_code=404, detail="Model not found")
+    s = Scenario(**payload.model_dump(), created_by=user.id)
+    db.add(s); db.commit(); db.refresh(s)
+    return ScenarioOut(**payload.model_dump(), id=s.id, created_by=user.id)
+
+@router.get("", response_model=list[ScenarioOut])
+def list_scenarios(model_id: int | None = None, db: Session = Depends(get_db)):
+    q = db.query(Scenario)
+    if model_id is not None:
+        q = q.filter(Scenario.model_id == model_id)
+    return [ScenarioOut(id=s.id, model_id=s.model_id, name=s.name, description=s.description, created_by=s.created_by) for s in q.all()]
+
+@router.delete("/{scenario_id}", response_model=dict, dependencies=[Depends(require_role("admin","trade_manager"))])
+def discard_scenario(scenario_id: int, db: Session = Depends(get_db)):
+    s = _get_scenario(db, scenario_id)
+    db.delete(s); db.commit()
+    return {"deleted": scenario_id}
+
+@router.get("/{scenario_id}/overlay", response_model=list[ScenarioAllocationOut])
+def list_overlay(scenario_id: int, db: Session = Depends(get_db)):
+    s = _get_scenario(db, scenario_id)
+    return [_overlay_out(o) for o in s.allocations]
+
+@router.post("/{scenario_id}/allocations", response_model=ScenarioAllocationOut, dependencies=[Depends(require_role("admin","trade_manager"))])
+def add_allocation(scenario_id: int, payload: AllocationCreate, db: Session = Depends(get_db)):
+    s = _get_scenario(db, scenario_id)
+    _check_cell(db, s, payload.gridcell_id)
+    start = payload.work_date
+    end = payload.end_date or payload.work_date
+    ok, reason = scenario_capacity_check(db, s.id, payload.gridcell_id, payload.trade_id, start, end, payload.num_workers or 1, s.model_id)
+    if not ok:
+        raise HTTPException(status_code=400, detail=reason)
+    o = ScenarioAllocation(scenario_id=s.id, op="add", **payload.model_dump())
+    db.add(o); db.commit(); db.refresh(o)
+    return _overlay_out(o, warning=reason)
+
+@router.delete("/{scenario_id}/allocations/{allocation_id}", response_model=ScenarioAllocationOut, dependencies=[Depends(require_role("admin","trade_manager"))])
+def remove_allocation(scenario_id: int, allocation_id: int, db: Session = Depends(get_db)):
+    s = _get_scenario(db, scenario_id)
+    a = db.query(Allocation).get(allocation_id)
+    if not a:
+        raise HTTPException(status_code=404, detail="Allocation not found")
+    _check_cell(db, s, a.gridcell_id)
+    o = db.query(ScenarioAllocation).filter(
+        ScenarioAllocation.scenario_id == s.id, ScenarioAllocation.base_allocation_id == allocation_id
+    ).first()
+    if not o:
+        o = ScenarioAllocation(scenario_id=s.id, op="remove", base_allocation_id=allocation_id)
+        db.add(o); db.commit(); db.refresh(o)
+    return _overlay_out(o)
+
+@router.delete("/{scenario_id}/overlay/{overlay_id}", response_model=dict, dependencies=[Depends(require_role("admin","trade_manager"))])
+def revert_overlay(scenario_id: int, overlay_id: int, db: Session = Depends(get_db)):
+    o = db.query(ScenarioAllocation).get(overlay_id)
+    if not o or o.scenario_id != scenario_id:
+        raise HTTPException(status_code=404, detail="Not found")
+    db.delete(o); db.commit()
+    return {"deleted": overlay_id}
+
+@router.put("/{scenario_id}/capacities", response_model=ScenarioCapacityOut, dependencies=[Depends(require_role("admin"))])
+def override_capacity(scenario_id: int, payload: ScenarioCapacityUpdate, db: Session = Depends(get_db)):
+    s = _get_scenario(db, scenario_id)
+    _check_cell(db, s, payload.gridcell_id)
+    o = db.query(ScenarioCapacity).filter(
+        ScenarioCapacity.scenario_id == s.id,
+        ScenarioCapacity.gridcell_id == payload.gridcell_id,
+        ScenarioCapacity.trade_id.is_(None) if payload.trade_id is None else ScenarioCapacity.trade_id == payload.trade_id,
+    ).first()
+    if o:
+        o.capacity = payload.capacity
+    else:
+        o = ScenarioCapacity(scenario_id=s.id, **payload.model_dump())
+        db.add(o)
+    db.commit(); db.refresh(o)
+    return ScenarioCapacityOut(id=o.id, scenario_id=o.scenario_id, gridcell_id=o.gridcell_id, trade_id=o.trade_id, capacity=o.capacity)
+
+@router.get("/{scenario_id}/utilization/{work_date}", response_model=list[CellUtilizationOut])
+def scenario_utilization(scenario_id: int, work_date: date, db: Session = Depends(get_db)):
+    s = _get_scenario(db, scenario_id)
+    return [CellUtilizationOut(**c) for c in cell_utilization(db, s.model_id, work_date, s.id)]
+
+@router.get("/{scenario_id}/diff/{work_date}", response_model=list[CellUtilizationDiff])
+def scenario_diff(scenario_id: int, work_date: date, db: Session = Depends(get_db)):
+    s = _get_scenario(db, scenario_id)
+    return [CellUtilizationDiff(**c) for c in utilization_diff(db, s, work_date)]
+
+@router.post("/{scenario_id}/promote", response_model=dict, dependencies=[Depends(require_role("admin"))])
+def promote(scenario_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    summary = promote_scenario(db, scenario_id, user.id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    shared_cache.invalidate(model_scope(summary["model_id"]), lattice_scope(summary["model_id"]))
+    return summary
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
+from app.core.cache import shared_cache
+from app.core.http_cache import cached_json_response
+from app.core.tracing import TracedRoute
 from app.deps import get_db, require_role
 from app.models.entities import Trade
 from app.schemas.schemas import TradeCreate, TradeOut
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("", response_model=TradeOut, dependencies=[Depends(require_role("admin"))])
 def create_trade(payload: TradeCreate, db: Session = Depends(get_db)):
@@ -12,9 +15,11 @@ def create_trade(payload: TradeCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Trade exists")
     t = Trade(name=payload.name)
     db.add(t); db.commit(); db.refresh(t)
+    shared_cache.invalidate("trades")
     return TradeOut(id=t.id, name=t.name)
 
 @router.get("", response_model=list[TradeOut])
-def list_trades(db: Session = Depends(get_db)):
-    ts = db.query(Trade).all()
-    return [TradeOut(id=t.id, name=t.name) for t in ts]
+def list_trades(request: Request, db: Session = Depends(get_db)):
+    def load():
+        return [TradeOut(id=t.id, name=t.name).model_dump() for t in db.query(Trade).all()]
+    return cached_json_response(request, "trades", "list", load)
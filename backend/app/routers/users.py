@@ -1,18 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.deps import get_db, get_current_user, require_role
-from app.core.security import hash_password
+from app.core.security import HashPoolBusy, hash_password_offloaded
+from app.core.tracing import TracedRoute
 from app.models.entities import User
 from app.schemas.schemas import UserCreate, UserOut
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("", response_model=UserOut, dependencies=[Depends(require_role("admin"))])
-def create_user(payload: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.username == payload.username).first():
+async def create_user(payload: UserCreate, db: Session = Depends(get_db)):
+    if await run_in_threadpool(lambda: db.query(User).filter(User.username == payload.username).first()):
         raise HTTPException(status_code=400, detail="Username exists")
-    u = User(username=payload.username, password_hash=hash_password(payload.password), role=payload.role)
-    db.add(u); db.commit(); db.refresh(u)
+    try:
+        password_hash = await hash_password_offloaded(payload.password)
+    except HashPoolBusy:
+        raise HTTPException(status_code=503, detail="Password hashing busy, retry shortly", headers={"Retry-After": "1"})
+
+    def insert() -> User:
+        u = User(username=payload.username, password_hash=password_hash, role=payload.role)
+        db.add(u); db.commit(); db.refresh(u)
+        return u
+
+    u = await run_in_threadpool(insert)
     return UserOut(id=u.id, username=u.username, role=u.role)
 
 @router.get("/me", response_model=UserOut)
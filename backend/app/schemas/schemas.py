@@ -99,3 +99,73 @@ class AllocationCreate(BaseModel):
 class AllocationOut(AllocationCreate):
     id: int
     created_by: int | None = None
+
+class ScenarioCreate(BaseModel):
+    model_id: int
+    name: str
+    description: str | None = None
+
+class ScenarioOut(ScenarioCreate):
+    id: int
+    created_by: int | None = None
+
+class ScenarioAllocationOut(BaseModel):
+    id: int
+    scenario_id: int
+    op: str
+    base_allocation_id: int | None = None
+    gridcell_id: int | None = None
+    trade_id: int | None = None
+    work_date: date | None = None
+    end_date: date | None = None
+    num_workers: int | None = None
+    description: str | None = None
+    warning: str | None = None
+
+class ScenarioCapacityUpdate(BaseModel):
+    gridcell_id: int
+    trade_id: int | None = None
+    capacity: int
+
+class ScenarioCapacityOut(ScenarioCapacityUpdate):
+    id: int
+    scenario_id: int
+
+class CellUtilizationOut(BaseModel):
+    gridcell_id: int
+    x_index: int
+    y_index: int
+    z_index: int
+    capacity: int
+    assigned: int
+
+class CellUtilizationDiff(BaseModel):
+    gridcell_id: int
+    x_index: int
+    y_index: int
+    z_index: int
+    base_assigned: int
+    base_capacity: int
+    scenario_assigned: int
+    scenario_capacity: int
+    delta_assigned: int
+
+class LatticeCellOut(BaseModel):
+    id: int
+    x_index: int
+    y_index: int
+    z_index: int
+    total_capacity: int
+
+class ZoneCellRef(BaseModel):
+    id: int
+    x_index: int
+    y_index: int
+    z_index: int
+
+class ZoneUtilizationOut(BaseModel):
+    cells: int
+    total_capacity: int
+    assigned: int
+    available: int
+    over_capacity: List[ZoneCellRef]
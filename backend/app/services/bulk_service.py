@@ -0,0 +1,302 @@
+"""
+Streaming bulk import/export of allocations and capacities.
+
+Imports read CSV or Parquet in chunks, resolve cells by (x_index, y_index,
+z_index) through an in-memory index, COPY each chunk into a temp staging table
+and then validate and apply the whole set with a few set-based statements in
+one transaction. Exports stream rows from a server-side cursor.
+"""
+import csv
+import io
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Tuple
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+from app.models.entities import Allocation, GridCell, Trade, TradeCapacity
+
+CHUNK_ROWS = 5000
+MAX_REPORTED = 100
+
+class BulkImportError(ValueError):
+    def __init__(self, errors: List[str]):
+        super().__init__(f"{len(errors)} invalid rows")
+        self.errors = errors
+
+def file_format(filename: str | None) -> str:
+    ext = (filename or "").rsplit(".", 1)[-1].lower()
+    if ext not in ("csv", "parquet"):
+        raise ValueError("Unsupported format. Supported: csv, parquet")
+    return ext
+
+def iter_chunks(f, fmt: str) -> Iterator[List[Dict]]:
+    """Yield lists of up to CHUNK_ROWS row dicts without reading the whole file."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(f).iter_batches(batch_size=CHUNK_ROWS):
+            yield batch.to_pylist()
+        return
+    reader = csv.DictReader(io.TextIOWrapper(f, encoding="utf-8-sig", newline=""))
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) == CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class CellIndex:
+    """(x_index, y_index, z_index) -> grid cell id for one model, loaded with a single query."""
+
+    def __init__(self, db: Session, model_id: int):
+        rows = db.execute(
+            select(GridCell.id, GridCell.x_index, GridCell.y_index, GridCell.z_index).where(GridCell.model_id == model_id)
+        )
+        self._ids = {(x, y, z): cid for cid, x, y, z in rows}
+
+    def resolve(self, row: Dict) -> int:
+        key = (int(row["x_index"]), int(row["y_index"]), int(row["z_index"]))
+        if key not in self._ids:
+            raise ValueError(f"no cell at {key}")
+        return self._ids[key]
+
+class TradeIndex:
+    """Resolve a row's trade by trade_id or by trade name."""
+
+    def __init__(self, db: Session):
+        self._by_name = {name: tid for tid, name in db.execute(select(Trade.id, Trade.name))}
+        self._ids = set(self._by_name.values())
+
+    def resolve(self, row: Dict) -> int:
+        if row.get("trade_id") not in (None, ""):
+            tid = int(row["trade_id"])
+            if tid not in self._ids:
+                raise ValueError(f"unknown trade_id {tid}")
+            return tid
+        name = row.get("trade")
+        if name not in self._by_name:
+            raise ValueError(f"unknown trade {name!r}")
+        return self._by_name[name]
+
+def _date(v) -> date | None:
+    if v in (None, ""):
+        return None
+    if isinstance(v, date):
+        return v
+    return date.fromisoformat(str(v)[:10])
+
+def _int(v) -> int | None:
+    return None if v in (None, "") else int(v)
+
+def _copy_rows(db: Session, table: str, columns: Tuple[str, ...], rows: Iterable[Tuple]):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    for r in rows:
+        w.writerow(["" if v is None else v for v in r])
+    buf.seek(0)
+    cur = db.connection().connection.cursor()
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+def _stage(db: Session, f, fmt: str, table: str, ddl: str, columns: Tuple[str, ...], parse_row) -> int:
+    """Parse the upload chunk by chunk into a temp table; raises BulkImportError on bad rows."""
+    db.execute(text(f"CREATE TEMP TABLE {table} ({ddl}) ON COMMIT DROP"))
+    errors: List[str] = []
+    total = 0
+    for chunk in iter_chunks(f, fmt):
+        parsed = []
+        for i, row in enumerate(chunk, start=total + 1):
+            try:
+                parsed.append(parse_row(row))
+            except (KeyError, TypeError, ValueError) as e:
+                if len(errors) < MAX_REPORTED:
+                    errors.append(f"row {i}: {e}")
+        total += len(chunk)
+        if not errors:
+            _copy_rows(db, table, columns, parsed)
+    if errors:
+        raise BulkImportError(errors)
+    return total
+
+OVER_TOTAL_SQL = """
+WITH days AS (
+  SELECT s.gridcell_id, d::date AS day, COALESCE(s.num_workers, 1) AS w
+  FROM import_allocations s,
+       generate_series(s.work_date, COALESCE(s.end_date, s.work_date), interval '1 day') d
+), incoming AS (
+  SELECT gridcell_id, day, SUM(w) AS w FROM days GROUP BY gridcell_id, day
+)
+SELECT i.gridcell_id, i.day, i.w + SUM(CASE WHEN a.id IS NOT NULL THEN COALESCE(a.num_workers, 1) ELSE 0 END) AS assigned, c.total_capacity AS capacity
+FROM incoming i
+JOIN grid_cells c ON c.id = i.gridcell_id
+LEFT JOIN allocations a ON a.model_id = :model_id AND a.gridcell_id = i.gridcell_id
+  AND a.work_date <= i.day AND (a.end_date IS NULL OR a.end_date >= i.day)
+GROUP BY i.gridcell_id, i.day, i.w, c.total_capacity
+HAVING i.w + SUM(CASE WHEN a.id IS NOT NULL THEN COALESCE(a.num_workers, 1) ELSE 0 END) > c.total_capacity
+ORDER BY i.gridcell_id, i.day
+LIMIT :limit
+"""
+
+OVER_TRADE_SQL = """
+WITH days AS (
+  SELECT s.gridcell_id, s.trade_id, d::date AS day, COALESCE(s.num_workers, 1) AS w
+  FROM import_allocations s,
+       generate_series(s.work_date, COALESCE(s.end_date, s.work_date), interval '1 day') d
+), incoming AS (
+  SELECT gridcell_id, trade_id, day, SUM(w) AS w FROM days GROUP BY gridcell_id, trade_id, day
+)
+SELECT i.gridcell_id, i.trade_id, i.day, i.w + SUM(CASE WHEN a.id IS NOT NULL THEN COALESCE(a.num_workers, 1) ELSE 0 END) AS assigned, tc.max_workers AS capacity
+FROM incoming i
+JOIN trade_capacities tc ON tc.model_id = :model_id AND tc.gridcell_id = i.gridcell_id AND tc.trade_id = i.trade_id
+LEFT JOIN allocations a ON a.model_id = :model_id AND a.gridcell_id = i.gridcell_id AND a.trade_id = i.trade_id
+  AND a.work_date <= i.day AND (a.end_date IS NULL OR a.end_date >= i.day)
+GROUP BY i.gridcell_id, i.trade_id, i.day, i.w, tc.max_workers
+HAVING i.w + SUM(CASE WHEN a.id IS NOT NULL THEN COALESCE(a.num_workers, 1) ELSE 0 END) > tc.max_workers
+ORDER BY i.gridcell_id, i.trade_id, i.day
+LIMIT :limit
+"""
+
+ALLOCATION_COLUMNS = ("gridcell_id", "trade_id", "work_date", "end_date", "num_workers", "description")
+
+def import_allocations(db: Session, model_id: int, f, fmt: str, user_id: int | None, reject_over_capacity: bool) -> Dict:
+    """Stage, capacity-check set-wise and insert allocations; nothing is written unless it all succeeds."""
+    cells, trades = CellIndex(db, model_id), TradeIndex(db)
+
+    def parse_row(row):
+        start, end = _date(row["work_date"]), _date(row.get("end_date"))
+        if start is None:
+            raise ValueError("work_date is required")
+        if end is not None and end < start:
+            raise ValueError("end_date before work_date")
+        return (cells.resolve(row), trades.resolve(row), start, end, _int(row.get("num_workers")), row.get("description") or None)
+
+    rows = _stage(db, f, fmt, "import_allocations",
+                  "gridcell_id INT, trade_id INT, work_date DATE, end_date DATE, num_workers INT, description TEXT",
+                  ALLOCATION_COLUMNS, parse_row)
+    params = {"model_id": model_id, "limit": MAX_REPORTED}
+    over_total = [dict(r._mapping) for r in db.execute(text(OVER_TOTAL_SQL), params)]
+    over_trade = [dict(r._mapping) for r in db.execute(text(OVER_TRADE_SQL), params)]
+    if reject_over_capacity and (over_total or over_trade):
+        raise BulkImportError(
+            [f"cell {o['gridcell_id']} on {o['day']}: Total capacity exceeded ({o['assigned']}/{o['capacity']})" for o in over_total]
+            + [f"cell {o['gridcell_id']} trade {o['trade_id']} on {o['day']}: Trade capacity exceeded ({o['assigned']}/{o['capacity']})" for o in over_trade]
+        )
+    db.execute(text(
+        f"INSERT INTO allocations (model_id, {', '.join(ALLOCATION_COLUMNS)}, created_by) "
+        f"SELECT :model_id, {', '.join(ALLOCATION_COLUMNS)}, :user_id FROM import_allocations"
+    ), {"model_id": model_id, "user_id": user_id})
+    return {"imported": rows, "over_total_capacity": over_total, "over_trade_capacity": over_trade}
+
+def import_trade_capacities(db: Session, model_id: int, f, fmt: str) -> Dict:
+    cells, trades = CellIndex(db, model_id), TradeIndex(db)
+    rows = _stage(db, f, fmt, "import_trade_capacities", "gridcell_id INT, trade_id INT, max_workers INT",
+                  ("gridcell_id", "trade_id", "max_workers"),
+                  lambda row: (cells.resolve(row), trades.resolve(row), int(row["max_workers"])))
+    # Last row wins for duplicate (cell, trade) pairs, as with repeated POST /capacities/trade.
+    db.execute(text("""
+        INSERT INTO trade_capacities (model_id, gridcell_id, trade_id, max_workers)
+        SELECT DISTINCT ON (gridcell_id, trade_id) :model_id, gridcell_id, trade_id, max_workers
+        FROM (SELECT *, row_number() OVER () AS n FROM import_trade_capacities) s
+        ORDER BY gridcell_id, trade_id, n DESC
+        ON CONFLICT (model_id, gridcell_id, trade_id) DO UPDATE SET max_workers = EXCLUDED.max_workers
+    """), {"model_id": model_id})
+    return {"imported": rows}
+
+def import_cell_capacities(db: Session, model_id: int, f, fmt: str) -> Dict:
+    cells = CellIndex(db, model_id)
+    rows = _stage(db, f, fmt, "import_cell_capacities", "gridcell_id INT, total_capacity INT",
+                  ("gridcell_id", "total_capacity"),
+                  lambda row: (cells.resolve(row), int(row["total_capacity"])))
+    db.execute(text("""
+        UPDATE grid_cells g SET total_capacity = s.total_capacity
+        FROM (
+            SELECT DISTINCT ON (gridcell_id) gridcell_id, total_capacity
+            FROM (SELECT *, row_number() OVER () AS n FROM import_cell_capacities) t
+            ORDER BY gridcell_id, n DESC
+        ) s
+        WHERE g.model_id = :model_id AND g.id = s.gridcell_id
+    """), {"model_id": model_id})
+    return {"imported": rows}
+
+EXPORTS = {
+    "allocations": (
+        ("id", "x_index", "y_index", "z_index", "trade", "work_date", "end_date", "num_workers", "description"),
+        lambda model_id: select(
+            Allocation.id, GridCell.x_index, GridCell.y_index, GridCell.z_index, Trade.name,
+            Allocation.work_date, Allocation.end_date, Allocation.num_workers, Allocation.description,
+        ).join(GridCell, GridCell.id == Allocation.gridcell_id).join(Trade, Trade.id == Allocation.trade_id)
+        .where(Allocation.model_id == model_id, GridCell.model_id == model_id).order_by(Allocation.id),
+    ),
+    "trade-capacities": (
+        ("x_index", "y_index", "z_index", "trade", "max_workers"),
+        lambda model_id: select(
+            GridCell.x_index, GridCell.y_index, GridCell.z_index, Trade.name, TradeCapacity.max_workers,
+        ).join(GridCell, GridCell.id == TradeCapacity.gridcell_id).join(Trade, Trade.id == TradeCapacity.trade_id)
+        .where(TradeCapacity.model_id == model_id, GridCell.model_id == model_id).order_by(TradeCapacity.id),
+    ),
+    "cell-capacities": (
+        ("x_index", "y_index", "z_index", "total_capacity"),
+        lambda model_id: select(GridCell.x_index, GridCell.y_index, GridCell.z_index, GridCell.total_capacity)
+        .where(GridCell.model_id == model_id).order_by(GridCell.id),
+    ),
+}
+
+def _row_batches(db: Session, kind: str, model_id: int) -> Iterator[List[Tuple]]:
+    _, query = EXPORTS[kind]
+    # stream_results makes psycopg2 use a named (server-side) cursor.
+    result = db.connection().execution_options(stream_results=True, yield_per=CHUNK_ROWS).execute(query(model_id))
+    for batch in result.partitions():
+        yield batch
+
+def export_csv(db: Session, kind: str, model_id: int) -> Iterator[bytes]:
+    columns, _ = EXPORTS[kind]
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(columns)
+    for batch in _row_batches(db, kind, model_id):
+        w.writerows(batch)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only sink that tracks its own position so Parquet footer offsets stay absolute."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+def _arrow_schema(columns: Tuple[str, ...]):
+    import pyarrow as pa
+    types = {"trade": pa.string(), "description": pa.string(), "work_date": pa.date32(), "end_date": pa.date32()}
+    return pa.schema([(c, types.get(c, pa.int64())) for c in columns])
+
+def export_parquet(db: Session, kind: str, model_id: int) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    columns, _ = EXPORTS[kind]
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    for batch in _row_batches(db, kind, model_id):
+        writer.write_table(pa.Table.from_pylist([dict(zip(columns, r)) for r in batch], schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
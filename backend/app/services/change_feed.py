@@ -0,0 +1,128 @@
+"""
+Per-model change feed over Postgres LISTEN/NOTIFY.
+
+Writers call publish() inside their transaction, so an event goes out only if
+the write commits. Each worker process runs one listener thread on a dedicated
+connection and fans events out to the SSE subscribers of the event's model,
+so every worker sees writes made by every other worker.
+
+NOTIFY payloads must stay under 8000 bytes, so events carry ids and numbers
+only; anything that would still exceed MAX_PAYLOAD_BYTES is sent as a resync.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.settings import settings
+from app.models.entities import Allocation
+
+CHANNEL = "capacity_changes"
+QUEUE_SIZE = 1000
+MAX_PAYLOAD_BYTES = 7900
+
+log = logging.getLogger(__name__)
+
+def publish(db: Session, model_id: int, event: Dict):
+    """Queue a NOTIFY for model_id; Postgres delivers it when db's transaction commits."""
+    payload = json.dumps({"model_id": model_id, **event}, default=str)
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        payload = json.dumps({"model_id": model_id, "type": "resync"})
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+
+def allocation_event(kind: str, a: Allocation) -> Dict:
+    """allocation_created / allocation_deleted with the cell's utilization delta over the allocation's days."""
+    workers = a.num_workers or 1
+    return {
+        "type": kind,
+        "allocation": {
+            "id": a.id, "gridcell_id": a.gridcell_id, "trade_id": a.trade_id, "work_date": a.work_date,
+            "end_date": a.end_date, "num_workers": a.num_workers,
+        },
+        "cells": [{
+            "gridcell_id": a.gridcell_id, "delta_workers": workers if kind == "allocation_created" else -workers,
+            "from": a.work_date, "to": a.end_date,
+        }],
+    }
+
+class ChangeFeed:
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._subscribers: Dict[int, set] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, model_id: int) -> asyncio.Queue:
+        self._ensure_listener()
+        q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[model_id].add((q, asyncio.get_running_loop()))
+        return q
+
+    def unsubscribe(self, model_id: int, q: asyncio.Queue):
+        with self._lock:
+            self._subscribers[model_id] = {s for s in self._subscribers[model_id] if s[0] is not q}
+            if not self._subscribers[model_id]:
+                del self._subscribers[model_id]
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name="change-feed", daemon=True)
+                self._thread.start()
+
+    @staticmethod
+    def _offer(q: asyncio.Queue, event: Dict):
+        if q.full():
+            # Slow consumer: drop its backlog and let it refetch instead.
+            while not q.empty():
+                q.get_nowait()
+            event = {"type": "resync", "model_id": event.get("model_id")}
+        q.put_nowait(event)
+
+    def dispatch(self, event: Dict):
+        """Deliver event to its model's subscribers, or to everyone if it has no model_id."""
+        with self._lock:
+            if "model_id" in event:
+                targets = list(self._subscribers.get(event["model_id"], ()))
+            else:
+                targets = [s for subs in self._subscribers.values() for s in subs]
+        for q, loop in targets:
+            loop.call_soon_threadsafe(self._offer, q, event)
+
+    def _listen(self):
+        reconnect = False
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                conn.cursor().execute(f"LISTEN {CHANNEL}")
+                if reconnect:
+                    # Events may have been missed while disconnected.
+                    self.dispatch({"type": "resync"})
+                reconnect = True
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        n = conn.notifies.pop(0)
+                        try:
+                            self.dispatch(json.loads(n.payload))
+                        except ValueError:
+                            log.warning("Dropping malformed change-feed payload")
+            except Exception as e:
+                log.warning(f"Change feed listener disconnected: {e}")
+                if conn is not None:
+                    conn.close()
+                time.sleep(2)
+
+change_feed = ChangeFeed(settings.db_url())
@@ -0,0 +1,143 @@
+"""
+Dense per-model lattice of grid cells for lookups by (x, y, z) without SQL.
+
+ids[x, y, z] holds the grid cell id (-1 where voxelization dropped the cell)
+and capacity[x, y, z] its total_capacity (0 where missing). Lattices are built
+with one query and kept per worker, keyed by the model's lattice version in the
+shared cache, so regenerating the grid or changing a cell capacity rebuilds them.
+
+numpy is imported here, so routers import this module on first use to keep it
+out of process startup.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Tuple
+import numpy as np
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+from app.core.cache import shared_cache, lattice_scope
+from app.models.entities import GridCell
+from app.services.scenario_service import effective_allocations
+
+MAX_LATTICES = 32
+
+Box = Tuple[int, int, int, int, int, int]
+
+class LatticeIndex:
+    def __init__(self, model_id: int, ids: np.ndarray, capacity: np.ndarray):
+        self.model_id = model_id
+        self.ids = ids
+        self.capacity = capacity
+
+    @classmethod
+    def build(cls, db: Session, model_id: int) -> "LatticeIndex":
+        rows = db.execute(
+            select(GridCell.id, GridCell.x_index, GridCell.y_index, GridCell.z_index, GridCell.total_capacity)
+            .where(GridCell.model_id == model_id)
+        ).all()
+        if not rows:
+            return cls(model_id, np.full((0, 0, 0), -1, dtype=np.int64), np.zeros((0, 0, 0), dtype=np.int64))
+        cid, x, y, z, cap = (np.array(col, dtype=np.int64) for col in zip(*rows))
+        shape = (int(x.max()) + 1, int(y.max()) + 1, int(z.max()) + 1)
+        ids = np.full(shape, -1, dtype=np.int64)
+        capacity = np.zeros(shape, dtype=np.int64)
+        ids[x, y, z] = cid
+        capacity[x, y, z] = cap
+        return cls(model_id, ids, capacity)
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.ids.shape
+
+    def _slices(self, box: Box):
+        """Inclusive box clamped to the lattice; empty where it lies outside (negative stops would wrap)."""
+        x0, x1, y0, y1, z0, z1 = box
+        out = []
+        for lo, hi, n in ((x0, x1, self.shape[0]), (y0, y1, self.shape[1]), (z0, z1, self.shape[2])):
+            lo = min(max(lo, 0), n)
+            out.append(slice(lo, max(min(hi + 1, n), lo)))
+        return tuple(out)
+
+    def cell_id(self, x: int, y: int, z: int) -> int | None:
+        if not all(0 <= v < n for v, n in zip((x, y, z), self.shape)):
+            return None
+        cid = int(self.ids[x, y, z])
+        return cid if cid >= 0 else None
+
+    def box_ids(self, box: Box) -> np.ndarray:
+        """Ids of existing cells in the inclusive box (x0, x1, y0, y1, z0, z1)."""
+        ids = self.ids[self._slices(box)]
+        return ids[ids >= 0]
+
+    def capacity_sum(self, box: Box) -> int:
+        return int(self.capacity[self._slices(box)].sum())
+
+    def neighbours(self, x: int, y: int, z: int, diagonal: bool = False) -> List[Dict]:
+        """Existing face neighbours (6) of a cell, or all 26 surrounding cells with diagonal=True."""
+        out = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    steps = abs(dx) + abs(dy) + abs(dz)
+                    if steps == 0 or (not diagonal and steps > 1):
+                        continue
+                    nx, ny, nz = x + dx, y + dy, z + dz
+                    cid = self.cell_id(nx, ny, nz)
+                    if cid is not None:
+                        out.append({"id": cid, "x_index": nx, "y_index": ny, "z_index": nz,
+                                    "total_capacity": int(self.capacity[nx, ny, nz])})
+        return out
+
+    def zone_utilization(self, db: Session, box: Box, work_date: date, new_workers: int = 0) -> Dict:
+        """Capacity vs. assigned workers for every cell of a box on one day, with one SQL query."""
+        sl = self._slices(box)
+        ids = self.ids[sl]
+        present = ids >= 0
+        eff = effective_allocations(None, self.model_id)
+        rows = db.execute(
+            select(eff.c.gridcell_id, func.sum(func.coalesce(eff.c.num_workers, 1)))
+            .where(
+                eff.c.gridcell_id.in_(ids[present].tolist()),
+                eff.c.work_date <= work_date,
+                or_(eff.c.end_date.is_(None), eff.c.end_date >= work_date),
+            ).group_by(eff.c.gridcell_id)
+        ).all() if present.any() else []
+        assigned = np.zeros(ids.shape, dtype=np.int64)
+        if rows:
+            row_ids, row_workers = (np.array(col, dtype=np.int64) for col in zip(*rows))
+            flat = ids.ravel()
+            order = np.argsort(flat)
+            assigned.ravel()[order[np.searchsorted(flat, row_ids, sorter=order)]] = row_workers
+        capacity = self.capacity[sl]
+        over = present & (assigned + new_workers > capacity)
+        origin = np.array([s.start for s in sl])
+        return {
+            "cells": int(present.sum()),
+            "total_capacity": int(capacity.sum()),
+            "assigned": int(assigned.sum()),
+            "available": int(np.clip(capacity - assigned, 0, None)[present].sum()),
+            "over_capacity": [
+                {"id": int(ids[tuple(p)]), "x_index": int(p[0] + origin[0]), "y_index": int(p[1] + origin[1]), "z_index": int(p[2] + origin[2])}
+                for p in np.argwhere(over)
+            ],
+        }
+
+_lattices: "OrderedDict[int, Tuple[str, LatticeIndex]]" = OrderedDict()
+_lock = threading.Lock()
+
+def get_lattice(db: Session, model_id: int) -> LatticeIndex:
+    """Per-worker lattice for a model, rebuilt when the model's cache version moves."""
+    version = shared_cache.generation(lattice_scope(model_id))
+    with _lock:
+        hit = _lattices.get(model_id)
+        if hit and hit[0] == version:
+            _lattices.move_to_end(model_id)
+            return hit[1]
+    lattice = LatticeIndex.build(db, model_id)
+    with _lock:
+        _lattices[model_id] = (version, lattice)
+        _lattices.move_to_end(model_id)
+        while len(_lattices) > MAX_LATTICES:
+            _lattices.popitem(last=False)
+    return lattice
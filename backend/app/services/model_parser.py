@@ -1,11 +1,13 @@
 """
 3D Model Parser for OBJ, GLTF, GLB, FBX, and other 3D formats
 Extracts bounding box and geometry data for voxelization
-Uses trimesh library for robust parsing of many formats
+Uses trimesh library for robust parsing of many formats; trimesh is imported on
+first use so that processes which never parse meshes do not pay for it
 """
-import trimesh
 from typing import Dict
+from app.core.tracing import traced
 
+@traced("parse_3d_model")
 def parse_3d_model(file_path: str, format: str) -> Dict:
     """
     Parse a 3D model file and return bounding box using trimesh
@@ -18,6 +20,8 @@ def parse_3d_model(file_path: str, format: str) -> Dict:
     Returns:
         Dictionary with bounding box coordinates and vertices
     """
+    import trimesh
+
     try:
         # Load mesh with trimesh (handles all formats automatically)
         mesh = trimesh.load(file_path, force='mesh')
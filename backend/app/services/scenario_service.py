@@ -0,0 +1,177 @@
+"""
+What-if scenarios as copy-on-write overlays over the live allocations.
+
+A scenario stores only what differs from the base: allocations it adds, base
+allocations it hides and capacity overrides. Reads union the base tables with
+the overlay in a single SQL statement, so creating a scenario never copies rows.
+"""
+from datetime import date
+from typing import Dict, List, Tuple
+from sqlalchemy import Integer, and_, case, cast, func, null, or_, select, true
+from sqlalchemy.orm import Session, aliased
+from app.core.tracing import traced
+from app.models.entities import Allocation, GridCell, Scenario, ScenarioAllocation, ScenarioCapacity, TradeCapacity
+from app.services.change_feed import publish
+
+def effective_allocations(scenario_id: int | None, model_id: int | None = None):
+    """Subquery of allocations as seen by a scenario (base minus removed plus added).
+
+    Pass model_id whenever it is known so only that model's partitions are read.
+    """
+    base = select(
+        Allocation.id.label("allocation_id"),
+        Allocation.gridcell_id, Allocation.trade_id,
+        Allocation.work_date, Allocation.end_date, Allocation.num_workers,
+    )
+    if model_id is not None:
+        base = base.where(Allocation.model_id == model_id)
+    if scenario_id is None:
+        return base.subquery("effective_allocations")
+    removed = select(ScenarioAllocation.base_allocation_id).where(
+        ScenarioAllocation.scenario_id == scenario_id, ScenarioAllocation.op == "remove"
+    )
+    added = select(
+        cast(null(), Integer).label("allocation_id"),
+        ScenarioAllocation.gridcell_id, ScenarioAllocation.trade_id,
+        ScenarioAllocation.work_date, ScenarioAllocation.end_date, ScenarioAllocation.num_workers,
+    ).where(ScenarioAllocation.scenario_id == scenario_id, ScenarioAllocation.op == "add")
+    return base.where(Allocation.id.not_in(removed)).union_all(added).subquery("effective_allocations")
+
+def _override(scenario_id: int | None, gridcell_id, trade_id):
+    trade_filter = ScenarioCapacity.trade_id.is_(None) if trade_id is None else ScenarioCapacity.trade_id == trade_id
+    return select(ScenarioCapacity.capacity).where(
+        ScenarioCapacity.scenario_id == scenario_id,
+        ScenarioCapacity.gridcell_id == gridcell_id,
+        trade_filter,
+    ).scalar_subquery()
+
+@traced("capacity_check")
+def scenario_capacity_check(db: Session, scenario_id: int | None, gridcell_id: int, trade_id: int,
+                            start_date, end_date, new_workers: int, model_id: int | None = None) -> Tuple[bool, str | None]:
+    """Same contract as grid_service.capacity_check, evaluated against base + overlay in one query.
+
+    model_id is looked up from the cell when not given, so only that model's partitions are read.
+    """
+    if model_id is None:
+        model_id = db.execute(select(GridCell.model_id).where(GridCell.id == gridcell_id)).scalar()
+        if model_id is None:
+            return False, "Grid cell not found"
+    eff = effective_allocations(scenario_id, model_id)
+    workers = func.coalesce(eff.c.num_workers, 1)
+    load = select(
+        func.coalesce(func.sum(workers), 0).label("total_assigned"),
+        func.coalesce(func.sum(case((eff.c.trade_id == trade_id, workers), else_=0)), 0).label("trade_assigned"),
+    ).where(
+        eff.c.gridcell_id == gridcell_id,
+        eff.c.work_date <= end_date,
+        or_(eff.c.end_date.is_(None), eff.c.end_date >= start_date),
+    ).subquery("load")
+    base_trade_cap = select(TradeCapacity.max_workers).where(
+        TradeCapacity.model_id == model_id, TradeCapacity.gridcell_id == gridcell_id, TradeCapacity.trade_id == trade_id
+    ).scalar_subquery()
+    row = db.execute(
+        select(
+            func.coalesce(_override(scenario_id, GridCell.id, None), GridCell.total_capacity).label("total_capacity"),
+            func.coalesce(_override(scenario_id, GridCell.id, trade_id), base_trade_cap).label("trade_capacity"),
+            load.c.total_assigned, load.c.trade_assigned,
+        ).select_from(GridCell).join(load, true()).where(GridCell.model_id == model_id, GridCell.id == gridcell_id)
+    ).first()
+    if not row:
+        return False, "Grid cell not found"
+    if row.total_assigned + new_workers > row.total_capacity:
+        return True, "Warning: Total capacity exceeded"
+    if row.trade_capacity is not None and row.trade_assigned + new_workers > row.trade_capacity:
+        return True, "Warning: Trade capacity exceeded"
+    return True, None
+
+def cell_utilization(db: Session, model_id: int, work_date: date, scenario_id: int | None = None) -> List[Dict]:
+    """Assigned workers and effective total capacity for every cell of a model on one day."""
+    eff = effective_allocations(scenario_id, model_id)
+    load = select(
+        eff.c.gridcell_id,
+        func.sum(func.coalesce(eff.c.num_workers, 1)).label("assigned"),
+    ).where(
+        eff.c.work_date <= work_date,
+        or_(eff.c.end_date.is_(None), eff.c.end_date >= work_date),
+    ).group_by(eff.c.gridcell_id).subquery("load")
+    override = aliased(ScenarioCapacity)
+    rows = db.execute(
+        select(
+            GridCell.id, GridCell.x_index, GridCell.y_index, GridCell.z_index,
+            func.coalesce(override.capacity, GridCell.total_capacity).label("capacity"),
+            func.coalesce(load.c.assigned, 0).label("assigned"),
+        ).select_from(GridCell)
+        .outerjoin(load, load.c.gridcell_id == GridCell.id)
+        .outerjoin(override, and_(
+            override.gridcell_id == GridCell.id,
+            override.scenario_id == scenario_id,
+            override.trade_id.is_(None),
+        ))
+        .where(GridCell.model_id == model_id)
+        .order_by(GridCell.id)
+    ).all()
+    return [{
+        "gridcell_id": r.id, "x_index": r.x_index, "y_index": r.y_index, "z_index": r.z_index,
+        "capacity": r.capacity, "assigned": int(r.assigned),
+    } for r in rows]
+
+def utilization_diff(db: Session, scenario: Scenario, work_date: date) -> List[Dict]:
+    """Per-cell utilization change of a scenario against the base; unchanged cells are omitted."""
+    base = {c["gridcell_id"]: c for c in cell_utilization(db, scenario.model_id, work_date)}
+    diff = []
+    for c in cell_utilization(db, scenario.model_id, work_date, scenario.id):
+        b = base[c["gridcell_id"]]
+        if b["assigned"] == c["assigned"] and b["capacity"] == c["capacity"]:
+            continue
+        diff.append({
+            "gridcell_id": c["gridcell_id"], "x_index": c["x_index"], "y_index": c["y_index"], "z_index": c["z_index"],
+            "base_assigned": b["assigned"], "base_capacity": b["capacity"],
+            "scenario_assigned": c["assigned"], "scenario_capacity": c["capacity"],
+            "delta_assigned": c["assigned"] - b["assigned"],
+        })
+    return diff
+
+def promote_scenario(db: Session, scenario_id: int, user_id: int | None) -> Dict | None:
+    """Apply a scenario's overlay to the base tables in one transaction and drop the scenario."""
+    try:
+        scenario = db.query(Scenario).filter(Scenario.id == scenario_id).with_for_update().first()
+        if not scenario:
+            return None
+        removed = [o.base_allocation_id for o in scenario.allocations if o.op == "remove"]
+        added = [Allocation(
+            model_id=scenario.model_id, gridcell_id=o.gridcell_id, trade_id=o.trade_id, work_date=o.work_date, end_date=o.end_date,
+            num_workers=o.num_workers, description=o.description, created_by=user_id,
+        ) for o in scenario.allocations if o.op == "add"]
+        capacities = [(o.gridcell_id, o.trade_id, o.capacity) for o in scenario.capacities]
+        summary = {
+            "promoted": scenario.id, "model_id": scenario.model_id, "allocations_added": len(added),
+            "allocations_removed": len(removed), "capacities_applied": len(capacities),
+        }
+        # Drop the overlay first so removed allocations are no longer referenced by it.
+        db.delete(scenario)
+        db.flush()
+        model_id = scenario.model_id
+        if removed:
+            db.query(Allocation).filter(
+                Allocation.model_id == model_id, Allocation.id.in_(removed)
+            ).delete(synchronize_session=False)
+        db.add_all(added)
+        for gridcell_id, trade_id, capacity in capacities:
+            if trade_id is None:
+                db.query(GridCell).filter(GridCell.model_id == model_id, GridCell.id == gridcell_id).update(
+                    {GridCell.total_capacity: capacity}, synchronize_session=False
+                )
+                continue
+            tc = db.query(TradeCapacity).filter(
+                TradeCapacity.model_id == model_id, TradeCapacity.gridcell_id == gridcell_id, TradeCapacity.trade_id == trade_id
+            ).first()
+            if tc:
+                tc.max_workers = capacity
+            else:
+                db.add(TradeCapacity(model_id=model_id, gridcell_id=gridcell_id, trade_id=trade_id, max_workers=capacity))
+        publish(db, summary["model_id"], {"type": "scenario_promoted", **summary})
+        db.commit()
+        return summary
+    except Exception:
+        db.rollback()
+        raise
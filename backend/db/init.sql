@@ -49,6 +49,7 @@ CREATE TABLE IF NOT EXISTS trades (
 
 CREATE TABLE IF NOT EXISTS trade_capacities (
   id SERIAL PRIMARY KEY,
+  model_id INT NOT NULL REFERENCES models(id) ON DELETE CASCADE,
   gridcell_id INT REFERENCES grid_cells(id) ON DELETE CASCADE,
   trade_id INT REFERENCES trades(id) ON DELETE CASCADE,
   max_workers INT NOT NULL,
@@ -65,6 +66,7 @@ CREATE TABLE IF NOT EXISTS users (
 
 CREATE TABLE IF NOT EXISTS allocations (
   id SERIAL PRIMARY KEY,
+  model_id INT NOT NULL REFERENCES models(id) ON DELETE CASCADE,
   gridcell_id INT REFERENCES grid_cells(id) ON DELETE CASCADE,
   trade_id INT REFERENCES trades(id) ON DELETE CASCADE,
   work_date DATE NOT NULL,
@@ -77,6 +79,59 @@ CREATE TABLE IF NOT EXISTS allocations (
 
 CREATE INDEX IF NOT EXISTS allocations_idx ON allocations(gridcell_id, trade_id, work_date);
 
+-- model_id is denormalized from grid_cells so allocations and trade capacities can be
+-- partitioned per model (see db/partitioning.sql); backfill databases created before it.
+ALTER TABLE trade_capacities ADD COLUMN IF NOT EXISTS model_id INT REFERENCES models(id) ON DELETE CASCADE;
+ALTER TABLE allocations ADD COLUMN IF NOT EXISTS model_id INT REFERENCES models(id) ON DELETE CASCADE;
+UPDATE trade_capacities t SET model_id = c.model_id FROM grid_cells c WHERE t.model_id IS NULL AND c.id = t.gridcell_id;
+UPDATE allocations a SET model_id = c.model_id FROM grid_cells c WHERE a.model_id IS NULL AND c.id = a.gridcell_id;
+-- Rows still without a model have no grid cell (or a cell without a model) and never counted toward capacity.
+DELETE FROM trade_capacities WHERE model_id IS NULL;
+DELETE FROM allocations WHERE model_id IS NULL;
+ALTER TABLE trade_capacities ALTER COLUMN model_id SET NOT NULL;
+ALTER TABLE allocations ALTER COLUMN model_id SET NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS trade_capacities_model_uniq ON trade_capacities(model_id, gridcell_id, trade_id);
+CREATE INDEX IF NOT EXISTS allocations_model_date_idx ON allocations(model_id, work_date);
+
+CREATE TABLE IF NOT EXISTS scenarios (
+  id SERIAL PRIMARY KEY,
+  model_id INT REFERENCES models(id) ON DELETE CASCADE,
+  name VARCHAR(100) NOT NULL,
+  description TEXT,
+  created_by INT REFERENCES users(id),
+  created_at TIMESTAMP DEFAULT now()
+);
+
+-- Copy-on-write overlay: only the allocations a scenario adds or hides are stored.
+CREATE TABLE IF NOT EXISTS scenario_allocations (
+  id SERIAL PRIMARY KEY,
+  scenario_id INT REFERENCES scenarios(id) ON DELETE CASCADE,
+  op VARCHAR(10) NOT NULL CHECK (op IN ('add','remove')),
+  base_allocation_id INT REFERENCES allocations(id) ON DELETE CASCADE,
+  gridcell_id INT REFERENCES grid_cells(id) ON DELETE CASCADE,
+  trade_id INT REFERENCES trades(id) ON DELETE CASCADE,
+  work_date DATE,
+  end_date DATE,
+  num_workers INT,
+  description TEXT,
+  CHECK ((op = 'remove' AND base_allocation_id IS NOT NULL)
+      OR (op = 'add' AND gridcell_id IS NOT NULL AND trade_id IS NOT NULL AND work_date IS NOT NULL))
+);
+
+CREATE INDEX IF NOT EXISTS scenario_allocations_idx ON scenario_allocations(scenario_id, op);
+
+-- trade_id NULL overrides grid_cells.total_capacity, otherwise trade_capacities.max_workers.
+CREATE TABLE IF NOT EXISTS scenario_capacities (
+  id SERIAL PRIMARY KEY,
+  scenario_id INT REFERENCES scenarios(id) ON DELETE CASCADE,
+  gridcell_id INT REFERENCES grid_cells(id) ON DELETE CASCADE,
+  trade_id INT REFERENCES trades(id) ON DELETE CASCADE,
+  capacity INT NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS scenario_capacities_uniq
+  ON scenario_capacities(scenario_id, gridcell_id, COALESCE(trade_id, 0));
+
 DO $$
 BEGIN
   IF NOT EXISTS (SELECT 1 FROM trades) THEN
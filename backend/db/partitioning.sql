@@ -0,0 +1,224 @@
+-- Per-model partitioning of grid_cells, trade_capacities and allocations.
+--
+-- grid_cells and trade_capacities are LIST-partitioned by model_id; allocations are
+-- LIST-partitioned by model_id and each model's partition is RANGE-partitioned by
+-- work_date (one partition per year plus a default). Queries that filter on model_id
+-- only touch the partitions of that model, and a finished project is removed by
+-- detaching its partitions instead of a cascading delete.
+--
+-- Run once after init.sql:  psql -f db/partitioning.sql
+-- Re-running is safe: the functions are replaced and the conversion is skipped when
+-- grid_cells is already partitioned. init.sql keeps working against the result.
+
+CREATE SCHEMA IF NOT EXISTS archive;
+CREATE TABLE IF NOT EXISTS archive.projects (LIKE projects);
+CREATE TABLE IF NOT EXISTS archive.models (LIKE models);
+
+-- Creates the partitions of model mid, with yearly allocation partitions for
+-- from_year..to_year. Rows already in the model's default allocation partition for
+-- a new year are moved into it, so this can also be used to split the default later.
+CREATE OR REPLACE FUNCTION cm_create_model_partitions(mid INT, from_year INT, to_year INT) RETURNS void AS $$
+DECLARE
+  y INT;
+  alloc TEXT := format('allocations_m%s', mid);
+  def TEXT := format('allocations_m%s_default', mid);
+  part TEXT;
+  lo DATE;
+  hi DATE;
+BEGIN
+  EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF grid_cells FOR VALUES IN (%s)', format('grid_cells_m%s', mid), mid);
+  EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF trade_capacities FOR VALUES IN (%s)', format('trade_capacities_m%s', mid), mid);
+  EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF allocations FOR VALUES IN (%s) PARTITION BY RANGE (work_date)', alloc, mid);
+  EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I DEFAULT', def, alloc);
+  FOR y IN from_year..to_year LOOP
+    part := format('allocations_m%s_y%s', mid, y);
+    CONTINUE WHEN to_regclass(part) IS NOT NULL;
+    lo := make_date(y, 1, 1);
+    hi := make_date(y + 1, 1, 1);
+    EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', alloc, def);
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)', part, alloc, lo, hi);
+    EXECUTE format(
+      'WITH moved AS (DELETE FROM %I WHERE work_date >= %L AND work_date < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+      def, lo, hi, alloc);
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I DEFAULT', alloc, def);
+  END LOOP;
+END $$ LANGUAGE plpgsql;
+
+-- New models get their partitions before any cell or allocation is written, whichever
+-- path inserts them. Allocation years follow the project's dates.
+CREATE OR REPLACE FUNCTION cm_models_partition_trigger() RETURNS trigger AS $$
+DECLARE
+  p projects%ROWTYPE;
+BEGIN
+  SELECT * INTO p FROM projects WHERE id = NEW.project_id;
+  PERFORM cm_create_model_partitions(
+    NEW.id,
+    extract(year FROM COALESCE(p.start_date, current_date))::int,
+    extract(year FROM COALESCE(p.end_date, p.start_date, current_date))::int);
+  RETURN NEW;
+END $$ LANGUAGE plpgsql;
+
+-- Detaches every partition of model mid. With keep they are moved to the archive
+-- schema (without foreign keys, so later deletes do not reach them), otherwise dropped.
+CREATE OR REPLACE FUNCTION cm_detach_model(mid INT, keep BOOLEAN) RETURNS void AS $$
+DECLARE
+  parent TEXT;
+  part TEXT;
+  rel TEXT;
+  con TEXT;
+BEGIN
+  -- Referencing tables first: grid_cells cannot lose a partition that is still referenced.
+  FOREACH parent IN ARRAY ARRAY['trade_capacities', 'allocations', 'grid_cells'] LOOP
+    part := format('%s_m%s', parent, mid);
+    CONTINUE WHEN to_regclass(part) IS NULL;
+    EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, part);
+    IF NOT keep THEN
+      EXECUTE format('DROP TABLE %I', part);
+      CONTINUE;
+    END IF;
+    FOR rel IN
+      SELECT part UNION ALL
+      SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = part::regclass
+    LOOP
+      FOR con IN SELECT conname FROM pg_constraint WHERE conrelid = rel::regclass AND contype = 'f' AND conparentid = 0 LOOP
+        EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', rel, con);
+      END LOOP;
+    END LOOP;
+    FOR rel IN
+      SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = part::regclass
+    LOOP
+      EXECUTE format('ALTER TABLE %I SET SCHEMA archive', rel);
+    END LOOP;
+    EXECUTE format('ALTER TABLE %I SET SCHEMA archive', part);
+  END LOOP;
+END $$ LANGUAGE plpgsql;
+
+-- Removes a project in O(number of models): detaches its partitions (archived with
+-- keep, dropped otherwise), then deletes the now-empty project and model rows.
+CREATE OR REPLACE FUNCTION cm_detach_project(pid INT, keep BOOLEAN) RETURNS SETOF INT AS $$
+DECLARE
+  mid INT;
+BEGIN
+  IF keep THEN
+    INSERT INTO archive.projects SELECT * FROM projects WHERE id = pid;
+    INSERT INTO archive.models SELECT * FROM models WHERE project_id = pid;
+  END IF;
+  FOR mid IN SELECT id FROM models WHERE project_id = pid ORDER BY id LOOP
+    PERFORM cm_detach_model(mid, keep);
+    RETURN NEXT mid;
+  END LOOP;
+  DELETE FROM projects WHERE id = pid;
+END $$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+  m RECORD;
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'grid_cells'::regclass) THEN
+    RETURN;
+  END IF;
+
+  -- Foreign keys into a partitioned table must cover its partition key; overlay rows
+  -- go with their scenario when the model is deleted, and generate_grid deletes the
+  -- model's overlay rows before its cells.
+  ALTER TABLE scenario_allocations DROP CONSTRAINT IF EXISTS scenario_allocations_base_allocation_id_fkey;
+  ALTER TABLE scenario_allocations DROP CONSTRAINT IF EXISTS scenario_allocations_gridcell_id_fkey;
+  ALTER TABLE scenario_capacities DROP CONSTRAINT IF EXISTS scenario_capacities_gridcell_id_fkey;
+
+  ALTER TABLE allocations RENAME TO allocations_unpartitioned;
+  ALTER TABLE trade_capacities RENAME TO trade_capacities_unpartitioned;
+  ALTER TABLE grid_cells RENAME TO grid_cells_unpartitioned;
+  ALTER SEQUENCE allocations_id_seq OWNED BY NONE;
+  ALTER SEQUENCE trade_capacities_id_seq OWNED BY NONE;
+  ALTER SEQUENCE grid_cells_id_seq OWNED BY NONE;
+
+  CREATE TABLE grid_cells (
+    id INT NOT NULL DEFAULT nextval('grid_cells_id_seq'),
+    model_id INT NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    x_index INT NOT NULL,
+    y_index INT NOT NULL,
+    z_index INT NOT NULL,
+    min_x DOUBLE PRECISION NOT NULL,
+    max_x DOUBLE PRECISION NOT NULL,
+    min_y DOUBLE PRECISION NOT NULL,
+    max_y DOUBLE PRECISION NOT NULL,
+    min_z DOUBLE PRECISION NOT NULL,
+    max_z DOUBLE PRECISION NOT NULL,
+    total_capacity INT NOT NULL DEFAULT 10,
+    footprint geometry(POLYGON, 3857),
+    PRIMARY KEY (model_id, id),
+    UNIQUE (model_id, x_index, y_index, z_index)
+  ) PARTITION BY LIST (model_id);
+
+  CREATE TABLE trade_capacities (
+    id INT NOT NULL DEFAULT nextval('trade_capacities_id_seq'),
+    model_id INT NOT NULL,
+    gridcell_id INT NOT NULL,
+    trade_id INT REFERENCES trades(id) ON DELETE CASCADE,
+    max_workers INT NOT NULL,
+    PRIMARY KEY (model_id, id),
+    FOREIGN KEY (model_id, gridcell_id) REFERENCES grid_cells(model_id, id) ON DELETE CASCADE
+  ) PARTITION BY LIST (model_id);
+
+  CREATE TABLE allocations (
+    id INT NOT NULL DEFAULT nextval('allocations_id_seq'),
+    model_id INT NOT NULL,
+    gridcell_id INT NOT NULL,
+    trade_id INT REFERENCES trades(id) ON DELETE CASCADE,
+    work_date DATE NOT NULL,
+    end_date DATE,
+    num_workers INT,
+    description TEXT,
+    created_by INT REFERENCES users(id),
+    created_at TIMESTAMP DEFAULT now(),
+    PRIMARY KEY (model_id, id, work_date),
+    FOREIGN KEY (model_id, gridcell_id) REFERENCES grid_cells(model_id, id) ON DELETE CASCADE
+  ) PARTITION BY LIST (model_id);
+
+  ALTER SEQUENCE grid_cells_id_seq OWNED BY grid_cells.id;
+  ALTER SEQUENCE trade_capacities_id_seq OWNED BY trade_capacities.id;
+  ALTER SEQUENCE allocations_id_seq OWNED BY allocations.id;
+
+  FOR m IN
+    SELECT mo.id,
+           extract(year FROM LEAST(COALESCE(p.start_date, current_date), COALESCE(a.first_day, current_date)))::int AS from_year,
+           extract(year FROM GREATEST(COALESCE(p.end_date, p.start_date, current_date), COALESCE(a.last_day, current_date)))::int AS to_year
+    FROM models mo
+    LEFT JOIN projects p ON p.id = mo.project_id
+    LEFT JOIN (
+      SELECT c.model_id, min(u.work_date) AS first_day, max(COALESCE(u.end_date, u.work_date)) AS last_day
+      FROM allocations_unpartitioned u JOIN grid_cells_unpartitioned c ON c.id = u.gridcell_id
+      GROUP BY c.model_id
+    ) a ON a.model_id = mo.id
+  LOOP
+    PERFORM cm_create_model_partitions(m.id, m.from_year, m.to_year);
+  END LOOP;
+
+  -- Cells without a model and rows of cells that no longer exist are orphans and are not carried over.
+  INSERT INTO grid_cells (id, model_id, x_index, y_index, z_index, min_x, max_x, min_y, max_y, min_z, max_z, total_capacity, footprint)
+  SELECT id, model_id, x_index, y_index, z_index, min_x, max_x, min_y, max_y, min_z, max_z, total_capacity, footprint
+  FROM grid_cells_unpartitioned WHERE model_id IS NOT NULL;
+  INSERT INTO trade_capacities (id, model_id, gridcell_id, trade_id, max_workers)
+  SELECT t.id, c.model_id, t.gridcell_id, t.trade_id, t.max_workers
+  FROM trade_capacities_unpartitioned t JOIN grid_cells_unpartitioned c ON c.id = t.gridcell_id
+  WHERE c.model_id IS NOT NULL;
+  INSERT INTO allocations (id, model_id, gridcell_id, trade_id, work_date, end_date, num_workers, description, created_by, created_at)
+  SELECT u.id, c.model_id, u.gridcell_id, u.trade_id, u.work_date, u.end_date, u.num_workers, u.description, u.created_by, u.created_at
+  FROM allocations_unpartitioned u JOIN grid_cells_unpartitioned c ON c.id = u.gridcell_id
+  WHERE c.model_id IS NOT NULL;
+
+  DROP TABLE allocations_unpartitioned, trade_capacities_unpartitioned, grid_cells_unpartitioned;
+
+  -- Same index names as init.sql, plus id indexes for lookups that do not know the model.
+  CREATE INDEX grid_cells_footprint_idx ON grid_cells USING GIST (footprint);
+  CREATE INDEX grid_cells_id_idx ON grid_cells(id);
+  CREATE UNIQUE INDEX trade_capacities_model_uniq ON trade_capacities(model_id, gridcell_id, trade_id);
+  CREATE INDEX trade_capacities_id_idx ON trade_capacities(id);
+  CREATE INDEX allocations_idx ON allocations(gridcell_id, trade_id, work_date);
+  CREATE INDEX allocations_model_date_idx ON allocations(model_id, work_date);
+  CREATE INDEX allocations_id_idx ON allocations(id);
+END$$;
+
+DROP TRIGGER IF EXISTS models_partitions ON models;
+CREATE TRIGGER models_partitions AFTER INSERT ON models
+  FOR EACH ROW EXECUTE FUNCTION cm_models_partition_trigger();
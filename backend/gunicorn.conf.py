@@ -0,0 +1,21 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+Worker count comes from WEB_CONCURRENCY (see app.core.settings); each worker
+sizes its DB pool from the same setting so the fleet stays under Postgres
+max_connections.
+"""
+import os
+from app.core.cache import shared_cache
+from app.core.settings import settings
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+def on_starting(server):
+    # Data may have changed while no worker was running to invalidate it.
+    shared_cache.clear()
@@ -0,0 +1,32 @@
+import io
+import pytest
+from app.services import bulk_service
+from app.services.bulk_service import iter_chunks, file_format, _ChunkSink, _arrow_schema
+
+def test_csv_is_read_in_chunks(monkeypatch):
+    monkeypatch.setattr(bulk_service, "CHUNK_ROWS", 2)
+    data = b"x_index,y_index,z_index,total_capacity\n0,0,0,5\n1,0,0,6\n2,0,0,7\n"
+    chunks = list(iter_chunks(io.BytesIO(data), "csv"))
+    assert [len(c) for c in chunks] == [2, 1]
+    assert chunks[1][0]["total_capacity"] == "7"
+
+def test_file_format():
+    assert file_format("schedule.CSV") == "csv"
+    with pytest.raises(ValueError):
+        file_format("schedule.xlsx")
+
+def test_parquet_chunks_form_a_valid_file():
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    columns = ("x_index", "y_index", "z_index", "total_capacity")
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    out = b""
+    for batch in ([(0, 0, 0, 5)], [(1, 0, 0, 6)]):
+        writer.write_table(pa.Table.from_pylist([dict(zip(columns, r)) for r in batch], schema=schema))
+        out += sink.drain()
+    writer.close()
+    out += sink.drain()
+    rows = [r for chunk in iter_chunks(io.BytesIO(out), "parquet") for r in chunk]
+    assert [r["total_capacity"] for r in rows] == [5, 6]
@@ -0,0 +1,38 @@
+import io
+from app.db.session import SessionLocal, engine
+from app.models.base import Base
+from app.models.entities import Project, Model, Trade, TradeCapacity
+from app.services.bulk_service import import_allocations
+from app.services.grid_service import generate_grid
+
+def setup_module():
+    Base.metadata.create_all(bind=engine)
+
+def teardown_module():
+    Base.metadata.drop_all(bind=engine)
+
+def test_import_filling_an_empty_cell_exactly_is_not_over_capacity():
+    db = SessionLocal()
+    try:
+        p = Project(name="Bulk", description=None, start_date=None, end_date=None)
+        db.add(p); db.commit(); db.refresh(p)
+        m = Model(project_id=p.id, name="Mock", format="mock", model_file_path=None,
+                  min_x=0, max_x=10, min_y=0, max_y=10, min_z=0, max_z=10)
+        db.add(m); db.commit(); db.refresh(m)
+        c0, = generate_grid(db, m, 1, 1, 1, 10)
+        t = Trade(name="Welding")
+        db.add(t); db.commit(); db.refresh(t)
+        db.add(TradeCapacity(gridcell_id=c0.id, trade_id=t.id, max_workers=10)); db.commit()
+
+        csv = b"x_index,y_index,z_index,trade,work_date,num_workers\n0,0,0,Welding,2025-05-01,10\n"
+        result = import_allocations(db, m.id, io.BytesIO(csv), "csv", None, reject_over_capacity=True)
+        assert result["over_total_capacity"] == [] and result["over_trade_capacity"] == []
+        db.commit()
+
+        csv = b"x_index,y_index,z_index,trade,work_date,num_workers\n0,0,0,Welding,2025-05-01,1\n"
+        result = import_allocations(db, m.id, io.BytesIO(csv), "csv", None, reject_over_capacity=False)
+        assert [o["assigned"] for o in result["over_total_capacity"]] == [11]
+        assert [o["assigned"] for o in result["over_trade_capacity"]] == [11]
+        db.rollback()
+    finally:
+        db.close()
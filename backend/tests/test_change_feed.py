@@ -0,0 +1,45 @@
+import asyncio
+import datetime
+import json
+from app.models.entities import Allocation
+from app.services.change_feed import ChangeFeed, allocation_event, publish
+
+def test_dispatch_fans_out_per_model():
+    feed = ChangeFeed("postgresql://unused")
+    feed._ensure_listener = lambda: None
+
+    async def run():
+        q1 = feed.subscribe(1)
+        q2 = feed.subscribe(2)
+        feed.dispatch({"model_id": 1, "type": "cell_capacity_changed", "gridcell_id": 5, "total_capacity": 9})
+        feed.dispatch({"type": "resync"})
+        await asyncio.sleep(0)
+        assert [e["type"] for e in [q1.get_nowait(), q1.get_nowait()]] == ["cell_capacity_changed", "resync"]
+        assert q2.get_nowait()["type"] == "resync" and q2.empty()
+        feed.unsubscribe(1, q1)
+        feed.dispatch({"model_id": 1, "type": "grid_regenerated"})
+        await asyncio.sleep(0)
+        assert q1.empty()
+
+    asyncio.run(run())
+
+class RecordingSession:
+    def __init__(self):
+        self.payloads = []
+
+    def execute(self, stmt, params):
+        self.payloads.append(params["payload"])
+
+def test_long_description_stays_under_notify_limit():
+    a = Allocation(id=1, gridcell_id=2, trade_id=3, work_date=datetime.date(2025, 1, 1), num_workers=2, description="x" * 9000)
+    db = RecordingSession()
+    publish(db, 7, allocation_event("allocation_created", a))
+    event = json.loads(db.payloads[0])
+    assert len(db.payloads[0].encode()) < 8000
+    assert event["type"] == "allocation_created" and "description" not in event["allocation"]
+    assert event["cells"][0]["delta_workers"] == 2
+
+def test_oversized_event_becomes_resync():
+    db = RecordingSession()
+    publish(db, 7, {"type": "bulk_import", "errors": ["x" * 9000]})
+    assert json.loads(db.payloads[0]) == {"model_id": 7, "type": "resync"}
@@ -0,0 +1,47 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+import app.core.http_cache as http_cache
+from app.core.cache import SharedCache
+from app.core.http_cache import ResponseCache, cached_json_response
+
+def test_lru_evicts_by_byte_budget():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+    cache.put("c", b"12345")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.size == 10
+
+def test_etag_304_and_invalidation(tmp_path, monkeypatch):
+    shared = SharedCache(str(tmp_path), ttl_seconds=60)
+    monkeypatch.setattr(http_cache, "shared_cache", shared)
+    monkeypatch.setattr(http_cache, "response_cache", ResponseCache(1024))
+    loads = []
+    api = FastAPI()
+
+    @api.get("/items")
+    def items(request: Request):
+        def load():
+            loads.append(1)
+            return [{"id": len(loads)}]
+        return cached_json_response(request, "items", "list", load)
+
+    client = TestClient(api)
+    first = client.get("/items")
+    etag = first.headers["etag"]
+    assert first.json() == [{"id": 1}]
+    assert client.get("/items", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/items").json() == [{"id": 1}]
+    assert len(loads) == 1
+
+    shared.invalidate("items")
+    second = client.get("/items", headers={"If-None-Match": etag})
+    assert second.status_code == 200 and second.headers["etag"] != etag
+    assert second.json() == [{"id": 2}]
+
+def test_weak_etag_from_proxy_matches():
+    assert http_cache._etag_matches('W/"trades-1-list"', '"trades-1-list"')
+    assert http_cache._etag_matches('"other", W/"trades-1-list"', '"trades-1-list"')
+    assert not http_cache._etag_matches('W/"trades-2-list"', '"trades-1-list"')
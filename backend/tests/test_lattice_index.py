@@ -0,0 +1,31 @@
+import numpy as np
+from app.services.lattice_index import LatticeIndex
+
+def make_lattice():
+    # 3x2x2 lattice with cell (1, 1, 1) voxelized away
+    ids = np.arange(12, dtype=np.int64).reshape(3, 2, 2) + 100
+    ids[1, 1, 1] = -1
+    capacity = np.where(ids >= 0, 5, 0)
+    return LatticeIndex(1, ids, capacity)
+
+def test_point_and_box_lookup():
+    lat = make_lattice()
+    assert lat.cell_id(0, 0, 0) == 100
+    assert lat.cell_id(1, 1, 1) is None
+    assert lat.cell_id(3, 0, 0) is None and lat.cell_id(-1, 0, 0) is None
+    assert sorted(lat.box_ids((1, 1, 0, 1, 0, 1)).tolist()) == [104, 105, 106]
+    assert lat.capacity_sum((0, 2, 0, 1, 0, 1)) == 11 * 5
+
+def test_boxes_outside_the_lattice_are_empty():
+    lat = make_lattice()
+    assert lat.box_ids((-5, -2, 0, 1, 0, 1)).size == 0
+    assert lat.capacity_sum((-5, -2, 0, 1, 0, 1)) == 0
+    assert lat.capacity_sum((3, 9, 0, 1, 0, 1)) == 0
+    assert lat.capacity_sum((2, 1, 0, 1, 0, 1)) == 0
+    assert lat.capacity_sum((-5, 0, -5, 99, -5, 99)) == 4 * 5
+
+def test_neighbours_skip_missing_cells():
+    lat = make_lattice()
+    face = {(n["x_index"], n["y_index"], n["z_index"]) for n in lat.neighbours(1, 0, 1)}
+    assert face == {(0, 0, 1), (2, 0, 1), (1, 0, 0)}
+    assert len(lat.neighbours(1, 0, 1, diagonal=True)) == 10
@@ -0,0 +1,125 @@
+import datetime
+import os
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from app.core.settings import settings
+from app.db import partitions
+
+# The partitioned schema lives in its own schema so it does not collide with the
+# create_all() tables of the other database tests.
+SCHEMA = "partition_test"
+DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db")
+
+def run_sql_file(engine, name):
+    conn = engine.raw_connection()
+    try:
+        with open(os.path.join(DB_DIR, name)) as f:
+            conn.cursor().execute(f.read())
+        conn.commit()
+    finally:
+        conn.close()
+
+@pytest.fixture(scope="module")
+def pg():
+    admin = create_engine(settings.db_url(), poolclass=NullPool, future=True)
+    with admin.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis SCHEMA public"))
+        had_archive = conn.execute(text("SELECT to_regnamespace('archive') IS NOT NULL")).scalar()
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    engine = create_engine(settings.db_url(), poolclass=NullPool, future=True,
+                           connect_args={"options": f"-c search_path={SCHEMA},public"})
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            if not had_archive:
+                conn.execute(text("DROP SCHEMA IF EXISTS archive CASCADE"))
+        admin.dispose()
+
+def add_model(db, project_id, name):
+    return db.execute(text("INSERT INTO models (project_id, name) VALUES (:p, :n) RETURNING id"), {"p": project_id, "n": name}).scalar()
+
+def add_cell(db, model_id):
+    return db.execute(text(
+        "INSERT INTO grid_cells (model_id, x_index, y_index, z_index, min_x, max_x, min_y, max_y, min_z, max_z) "
+        "VALUES (:m, 0, 0, 0, 0, 1, 0, 1, 0, 1) RETURNING id"
+    ), {"m": model_id}).scalar()
+
+def add_allocation(db, model_id, cell_id, day):
+    db.execute(text(
+        "INSERT INTO allocations (model_id, gridcell_id, trade_id, work_date, num_workers) "
+        "VALUES (:m, :c, (SELECT min(id) FROM trades), :d, 1)"
+    ), {"m": model_id, "c": cell_id, "d": day})
+
+def count(db, table, **where):
+    if db.execute(text("SELECT to_regclass(:t)"), {"t": table}).scalar() is None:
+        return None
+    cond = " AND ".join(f"{k} = :{k}" for k in where) or "true"
+    return db.execute(text(f"SELECT count(*) FROM {table} WHERE {cond}"), where).scalar()
+
+def test_partitioning_archive_and_drop(pg):
+    run_sql_file(pg, "init.sql")
+    db = Session(pg)
+    try:
+        kept = db.execute(text("INSERT INTO projects (name, start_date, end_date) VALUES ('Kept', '2025-01-01', '2025-12-31') RETURNING id")).scalar()
+        gone = db.execute(text("INSERT INTO projects (name) VALUES ('Gone') RETURNING id")).scalar()
+        m_kept, m_gone = add_model(db, kept, "Hull"), add_model(db, gone, "Deck")
+        c_kept, c_gone = add_cell(db, m_kept), add_cell(db, m_gone)
+        add_allocation(db, m_kept, c_kept, datetime.date(2025, 6, 1))
+        add_allocation(db, m_kept, c_kept, datetime.date(2026, 2, 1))
+        add_allocation(db, m_gone, c_gone, datetime.date(2025, 6, 1))
+        db.execute(text("INSERT INTO trade_capacities (model_id, gridcell_id, trade_id, max_workers) VALUES (:m, :c, (SELECT min(id) FROM trades), 4)"),
+                   {"m": m_kept, "c": c_kept})
+        db.commit()
+        assert not partitions.is_partitioned(db)
+
+        run_sql_file(pg, "partitioning.sql")
+        run_sql_file(pg, "partitioning.sql")
+        run_sql_file(pg, "init.sql")
+        assert partitions.is_partitioned(db)
+        # Existing rows land in their model's yearly partitions, covering the project and the allocations.
+        assert count(db, f"allocations_m{m_kept}_y2025") == 1
+        assert count(db, f"allocations_m{m_kept}_y2026") == 1
+        assert count(db, f"allocations_m{m_kept}_default") == 0
+        assert count(db, f"trade_capacities_m{m_kept}") == 1
+        assert count(db, "allocations") == 3
+
+        # New models get partitions from the trigger; add-years moves rows out of the default partition.
+        later = db.execute(text("INSERT INTO projects (name, start_date) VALUES ('Later', '2027-01-01') RETURNING id")).scalar()
+        m_later = add_model(db, later, "Keel")
+        c_later = add_cell(db, m_later)
+        add_allocation(db, m_later, c_later, datetime.date(2027, 3, 1))
+        add_allocation(db, m_later, c_later, datetime.date(2028, 3, 1))
+        db.commit()
+        assert count(db, f"allocations_m{m_later}_y2027") == 1
+        assert count(db, f"allocations_m{m_later}_default") == 1
+        partitions.add_allocation_years(db, m_later, 2028, 2028)
+        db.commit()
+        assert count(db, f"allocations_m{m_later}_y2028") == 1
+        assert count(db, f"allocations_m{m_later}_default") == 0
+
+        assert partitions.detach_project(db, kept, keep=True) == [m_kept]
+        assert partitions.detach_project(db, gone, keep=False) == [m_gone]
+        db.commit()
+
+        assert count(db, "projects", id=kept) == 0 and count(db, "models", id=m_kept) == 0
+        assert count(db, "allocations", model_id=m_kept) == 0 and count(db, "grid_cells", model_id=m_kept) == 0
+        assert count(db, "archive.projects", id=kept) == 1 and count(db, "archive.models", id=m_kept) == 1
+        assert count(db, f"archive.allocations_m{m_kept}_y2025") == 1
+        assert count(db, f"archive.allocations_m{m_kept}_y2026") == 1
+        assert count(db, f"archive.grid_cells_m{m_kept}") == 1
+        assert count(db, f"archive.trade_capacities_m{m_kept}") == 1
+
+        assert count(db, "projects", id=gone) == 0 and count(db, "archive.projects", id=gone) == 0
+        assert count(db, f"allocations_m{m_gone}") is None and count(db, f"archive.allocations_m{m_gone}") is None
+        assert count(db, f"grid_cells_m{m_gone}") is None and count(db, f"archive.grid_cells_m{m_gone}") is None
+
+        assert count(db, "allocations") == 2 and count(db, "allocations", model_id=m_later) == 2
+        assert count(db, "grid_cells") == 1
+    finally:
+        db.close()
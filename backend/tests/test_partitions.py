@@ -0,0 +1,20 @@
+import pytest
+from app.db import partitions
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def execute(self, stmt, params=None):
+        self.calls.append((str(stmt), params))
+        return self.rows
+
+def test_detach_project_returns_model_ids():
+    db = FakeSession([(3,), (4,)])
+    assert partitions.detach_project(db, 7, keep=True) == [3, 4]
+    assert db.calls == [("SELECT cm_detach_project(:pid, :keep)", {"pid": 7, "keep": True})]
+
+def test_cli_rejects_unknown_command():
+    with pytest.raises(SystemExit):
+        partitions.main(["purge", "1"])
@@ -0,0 +1,85 @@
+import datetime
+from app.db.session import SessionLocal, engine
+from app.models.base import Base
+from app.models.entities import Project, Model, Trade, Allocation, Scenario, ScenarioAllocation, ScenarioCapacity
+from app.services.grid_service import generate_grid
+from app.services.scenario_service import scenario_capacity_check, cell_utilization, utilization_diff, promote_scenario
+
+def setup_module():
+    Base.metadata.create_all(bind=engine)
+
+def teardown_module():
+    Base.metadata.drop_all(bind=engine)
+
+def test_scenario_overlay_and_promote():
+    db = SessionLocal()
+    try:
+        day = datetime.date(2025, 3, 1)
+        p = Project(name="Scenario", description=None, start_date=None, end_date=None)
+        db.add(p); db.commit(); db.refresh(p)
+        m = Model(project_id=p.id, name="Mock", format="mock", model_file_path=None,
+                  min_x=0, max_x=10, min_y=0, max_y=10, min_z=0, max_z=10)
+        db.add(m); db.commit(); db.refresh(m)
+        c0, c1 = generate_grid(db, m, 2, 1, 1, 5)
+        t = Trade(name="Piping")
+        db.add(t); db.commit(); db.refresh(t)
+        base = Allocation(gridcell_id=c0.id, trade_id=t.id, work_date=day, num_workers=4)
+        db.add(base); db.commit(); db.refresh(base)
+
+        s = Scenario(model_id=m.id, name="Move piping")
+        db.add(s); db.commit(); db.refresh(s)
+        db.add_all([
+            ScenarioAllocation(scenario_id=s.id, op="remove", base_allocation_id=base.id),
+            ScenarioAllocation(scenario_id=s.id, op="add", gridcell_id=c1.id, trade_id=t.id, work_date=day, num_workers=4),
+            ScenarioCapacity(scenario_id=s.id, gridcell_id=c1.id, trade_id=None, capacity=8),
+        ])
+        db.commit()
+
+        assert scenario_capacity_check(db, None, c0.id, t.id, day, day, 2) == (True, "Warning: Total capacity exceeded")
+        assert scenario_capacity_check(db, s.id, c0.id, t.id, day, day, 2) == (True, None)
+        assert scenario_capacity_check(db, s.id, c1.id, t.id, day, day, 4) == (True, None)
+
+        util = {c["gridcell_id"]: c for c in cell_utilization(db, m.id, day, s.id)}
+        assert util[c0.id]["assigned"] == 0
+        assert util[c1.id]["assigned"] == 4 and util[c1.id]["capacity"] == 8
+
+        diff = {d["gridcell_id"]: d for d in utilization_diff(db, s, day)}
+        assert diff[c0.id]["delta_assigned"] == -4
+        assert diff[c1.id]["delta_assigned"] == 4
+
+        summary = promote_scenario(db, s.id, None)
+        assert summary["allocations_added"] == 1 and summary["allocations_removed"] == 1
+        assert db.query(Scenario).get(s.id) is None
+        util = {c["gridcell_id"]: c for c in cell_utilization(db, m.id, day)}
+        assert util[c0.id]["assigned"] == 0
+        assert util[c1.id]["assigned"] == 4 and util[c1.id]["capacity"] == 8
+    finally:
+        db.close()
+
+def test_regenerating_the_grid_clears_scenario_overlays():
+    db = SessionLocal()
+    try:
+        day = datetime.date(2025, 4, 1)
+        p = Project(name="Regenerate", description=None, start_date=None, end_date=None)
+        db.add(p); db.commit(); db.refresh(p)
+        m = Model(project_id=p.id, name="Mock", format="mock", model_file_path=None,
+                  min_x=0, max_x=10, min_y=0, max_y=10, min_z=0, max_z=10)
+        db.add(m); db.commit(); db.refresh(m)
+        c0, = generate_grid(db, m, 1, 1, 1, 5)
+        t = Trade(name="Painting")
+        db.add(t); db.commit(); db.refresh(t)
+        s = Scenario(model_id=m.id, name="Paint")
+        db.add(s); db.commit(); db.refresh(s)
+        db.add_all([
+            ScenarioAllocation(scenario_id=s.id, op="add", gridcell_id=c0.id, trade_id=t.id, work_date=day, num_workers=2),
+            ScenarioCapacity(scenario_id=s.id, gridcell_id=c0.id, trade_id=t.id, capacity=3),
+        ])
+        db.commit()
+
+        generate_grid(db, m, 2, 1, 1, 5)
+        assert db.query(ScenarioAllocation).filter(ScenarioAllocation.scenario_id == s.id).count() == 0
+        assert db.query(ScenarioCapacity).filter(ScenarioCapacity.scenario_id == s.id).count() == 0
+        summary = promote_scenario(db, s.id, None)
+        assert summary["allocations_added"] == 0 and summary["capacities_applied"] == 0
+    finally:
+        db.close()
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from jose import JWTError
+from app.core import security
+from app.core.security import HashPoolBusy, create_access_token, decode_token
+
+def test_decode_token_caches_until_expiry(monkeypatch):
+    token = create_access_token("cached", "viewer")
+    assert decode_token(token)["sub"] == "cached"
+    calls = []
+    def fake_decode(*args, **kwargs):
+        calls.append(1)
+        return {"sub": "cached", "role": "viewer"}
+    monkeypatch.setattr(security.jwt, "decode", fake_decode)
+    assert decode_token(token)["role"] == "viewer"
+    assert calls == []
+
+    now = time.time()
+    monkeypatch.setattr(security.time, "time", lambda: now + 7200)
+    decode_token(token)
+    assert calls == [1]
+
+def test_callers_cannot_modify_cached_claims():
+    token = create_access_token("first-use", "viewer")
+    decode_token(token)["role"] = "admin"
+    assert decode_token(token)["role"] == "viewer"
+
+def test_invalid_tokens_are_not_cached():
+    with pytest.raises(JWTError):
+        decode_token("not-a-token")
+    with pytest.raises(JWTError):
+        decode_token("not-a-token")
+
+def test_hash_offload_rejects_when_queue_is_full(monkeypatch):
+    monkeypatch.setattr(security, "_pending", threading.BoundedSemaphore(1))
+    security._pending.acquire()
+    with pytest.raises(HashPoolBusy):
+        asyncio.run(security.verify_password_offloaded("pass", "hash"))
+
+def test_hash_offload_frees_its_slot(monkeypatch):
+    monkeypatch.setattr(security, "_pending", threading.BoundedSemaphore(1))
+    with ThreadPoolExecutor(1) as pool:
+        monkeypatch.setattr(security, "_hash_pool", lambda: pool)
+        hashed = asyncio.run(security.hash_password_offloaded("pass"))
+        assert asyncio.run(security.verify_password_offloaded("pass", hashed))
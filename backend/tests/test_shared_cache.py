@@ -0,0 +1,60 @@
+import os
+import pytest
+from app.core.cache import SharedCache
+from app.core.settings import Settings, available_cpus
+
+def test_get_or_load_and_invalidate(tmp_path):
+    cache = SharedCache(str(tmp_path), ttl_seconds=60)
+    calls = []
+    def load():
+        calls.append(1)
+        return [{"id": 1}]
+    assert cache.get_or_load("model:1", "grid", load) == [{"id": 1}]
+    assert cache.get_or_load("model:1", "grid", load) == [{"id": 1}]
+    assert len(calls) == 1
+    cache.invalidate("model:1")
+    assert cache.get("model:1", "grid") is None
+    cache.get_or_load("model:1", "grid", load)
+    assert len(calls) == 2
+
+def test_stale_write_after_invalidate_is_not_served(tmp_path):
+    cache = SharedCache(str(tmp_path), ttl_seconds=60)
+    gen = cache.generation("trades")
+    cache.invalidate("trades")
+    cache.set("trades", "list", ["stale"], gen)
+    assert cache.get("trades", "list") is None
+
+def test_pool_size_respects_max_connections():
+    s = Settings(WEB_CONCURRENCY=8, DB_MAX_CONNECTIONS=50, DB_RESERVED_CONNECTIONS=10)
+    pool_size, max_overflow = s.db_pool_size()
+    # Plus one change-feed listener connection per worker.
+    assert (pool_size + max_overflow + 1) * 8 <= 40
+    assert pool_size >= 1
+
+def test_too_many_workers_for_max_connections_fail_at_startup():
+    with pytest.raises(ValueError, match="WEB_CONCURRENCY=90"):
+        Settings(WEB_CONCURRENCY=90, DB_MAX_CONNECTIONS=100, DB_RESERVED_CONNECTIONS=10)
+    s = Settings(WEB_CONCURRENCY=45, DB_MAX_CONNECTIONS=100, DB_RESERVED_CONNECTIONS=10)
+    assert s.db_pool_size() == (1, 0)
+
+def test_available_cpus_follows_the_cgroup_quota(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert available_cpus(str(tmp_path)) == 2
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert available_cpus(str(tmp_path)) == len(os.sched_getaffinity(0))
+
+def test_failed_write_still_serves_loaded_value(tmp_path, monkeypatch):
+    cache = SharedCache(str(tmp_path), ttl_seconds=60)
+    def full(path, data):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(cache, "_write_atomic", full)
+    assert cache.get_or_load("model:1", "grid", lambda: [1]) == [1]
+
+def test_prune_removes_expired_entries(tmp_path):
+    cache = SharedCache(str(tmp_path), ttl_seconds=60)
+    cache.set("model:1", "utilization:2025-01-01", [1])
+    path = cache._entry_path("model:1", cache.generation("model:1"), "utilization:2025-01-01")
+    os.utime(path, (0, 0))
+    cache.prune()
+    assert not os.path.exists(path)
+    assert cache.generation("model:1")
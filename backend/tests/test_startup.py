@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+HEAVY = ("trimesh", "shapely", "geoalchemy2", "numpy", "pyarrow")
+
+def test_app_import_does_not_load_geometry_stack():
+    code = "import sys, app.main; print(','.join(m for m in %r if m in sys.modules))" % (HEAVY,)
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.dirname(os.path.dirname(__file__)),
+        capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.strip() == ""
+
+def test_asgi_entrypoint_does_not_import_the_framework():
+    code = "import sys, app.asgi; print(','.join(m for m in ('fastapi', 'sqlalchemy', 'app.main') if m in sys.modules))"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.dirname(os.path.dirname(__file__)),
+        capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.strip() == ""
+
+def test_asgi_entrypoint_serves_health_then_the_app():
+    from fastapi.testclient import TestClient
+    from app.asgi import LazyApp
+
+    with TestClient(LazyApp()) as client:
+        assert client.get("/health").json() == {"status": "ok"}
+        assert client.get("/no-such-route").json() == {"detail": "Not Found"}
+
+def test_failed_app_import_fails_health():
+    from fastapi.testclient import TestClient
+    from app.asgi import LazyApp
+
+    with TestClient(LazyApp("app.no_such_module"), raise_server_exceptions=False) as client:
+        assert client.get("/other").status_code == 500
+        assert client.get("/health").status_code == 503
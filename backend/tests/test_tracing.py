@@ -0,0 +1,83 @@
+import json
+import os
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+import app.core.tracing as tracing
+from app.core.settings import settings
+from app.core.tracing import TraceExporter, TracedJSONResponse, TracedRoute, TracingMiddleware, span, traced
+
+@traced("capacity_check")
+def check():
+    return True
+
+def make_client(tmp_path, monkeypatch, **overrides):
+    exporter = TraceExporter(str(tmp_path), 1 << 20, 10)
+    monkeypatch.setattr(tracing, "exporter", exporter)
+    for k, v in {"TRACE_ENABLED": True, "TRACE_SAMPLE_RATE": 1.0, "TRACE_SLOW_MS": 0, "PROFILING_ENABLED": False, **overrides}.items():
+        monkeypatch.setattr(settings, k, v)
+    router = APIRouter(route_class=TracedRoute)
+
+    @router.get("/work")
+    def work():
+        with span("voxelize", cells=3):
+            check()
+        return {"ok": True}
+
+    api = FastAPI(default_response_class=TracedJSONResponse)
+    api.include_router(router)
+    api.add_middleware(TracingMiddleware)
+    return TestClient(api), exporter
+
+def read_spans(tmp_path):
+    with open(os.path.join(tmp_path, f"traces-{os.getpid()}.jsonl")) as f:
+        return [json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"] for line in f]
+
+def test_spans_exported_as_otlp_json(tmp_path, monkeypatch):
+    client, exporter = make_client(tmp_path, monkeypatch)
+    r = client.get("/work")
+    exporter.flush()
+    [spans] = read_spans(tmp_path)
+    by_name = {s["name"]: s for s in spans}
+    assert set(by_name) == {"GET /work", "work", "voxelize", "capacity_check", "serialize_response"}
+    root = by_name["GET /work"]
+    assert r.headers["x-trace-id"] == root["traceId"] and "parentSpanId" not in root
+    assert by_name["work"]["parentSpanId"] == root["spanId"]
+    assert by_name["capacity_check"]["parentSpanId"] == by_name["voxelize"]["spanId"]
+    assert {"key": "cells", "value": {"intValue": "3"}} in by_name["voxelize"]["attributes"]
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in root["attributes"]
+
+def test_unsampled_fast_requests_are_not_exported(tmp_path, monkeypatch):
+    client, exporter = make_client(tmp_path, monkeypatch, TRACE_SAMPLE_RATE=0.0, TRACE_SLOW_MS=10_000)
+    client.get("/work")
+    exporter.flush()
+    assert not os.path.exists(os.path.join(tmp_path, f"traces-{os.getpid()}.jsonl"))
+
+def test_profile_flag_writes_cprofile_stats(tmp_path, monkeypatch):
+    client, exporter = make_client(tmp_path, monkeypatch, TRACE_SAMPLE_RATE=0.0, PROFILING_ENABLED=True)
+    trace_id = client.get("/work", headers={"X-Profile": "1"}).headers["x-trace-id"]
+    exporter.flush()
+    assert os.path.exists(os.path.join(tmp_path, "profiles", f"{trace_id}.prof"))
+
+def test_span_outside_request_is_noop():
+    with span("orphan") as s:
+        assert s is None
+    assert check() is True
+
+def test_overlapping_profiles_on_one_thread_skip_the_second(monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_MAX_SPANS", 100)
+    first, second = tracing.Trace("cprofile"), tracing.Trace("cprofile")
+    outer = tracing.Span(first, "outer", None, {})
+    inner = tracing.Span(second, "inner", None, {})
+    token = tracing._current.set(outer)
+    try:
+        with tracing._Profiled():
+            tracing._current.set(inner)
+            with tracing._Profiled():
+                check()
+            tracing._current.set(outer)
+            check()
+        assert first.profiler.getstats()
+    finally:
+        tracing._current.reset(token)
+    assert second.profiler is None and inner.attributes == {"profile.skipped": True}
+    assert not tracing._profiling.active
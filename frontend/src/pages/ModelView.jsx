@@ -1,6 +1,7 @@
 import React, { useEffect, useRef, useState, useMemo } from "react";
 import { useParams } from "react-router-dom";
 import client from "../api/client.js";
+import { applyAllocationEvent, applyCellCapacityEvent } from "../utils/changeFeed.js";
 import * as THREE from "three";
 import { OrbitControls } from "three/examples/jsm/controls/OrbitControls.js";
 
@@ -128,11 +129,48 @@ export default function ModelView() {
 
   useEffect(() => {
     (async () => {
-      const res = await client.get(`/allocations/by-date/${date}`);
+      const res = await client.get(`/allocations/by-date/${date}`, { params: { model_id: id } });
       setAllocs(res.data.filter(a => cells.some(c => c.id === a.gridcell_id) && (!tradeId || a.trade_id === Number(tradeId))));
     })();
   }, [date, tradeId, cells.length]);
 
+  const viewRef = useRef({ date, tradeId, cellIds: new Set() });
+  viewRef.current = { date, tradeId, cellIds: new Set(cells.map(c => c.id)) };
+
+  useEffect(() => {
+    if (!model) return;
+    let es;
+    let reopenTimer;
+    const onAllocation = (e) => setAllocs(prev => applyAllocationEvent(prev, JSON.parse(e.data), viewRef.current));
+    const resync = async () => {
+      const cellsRes = await client.get(`/grid/${model.id}`);
+      setCells(cellsRes.data);
+      const ids = new Set(cellsRes.data.map(c => c.id));
+      const { date: d, tradeId: t } = viewRef.current;
+      const res = await client.get(`/allocations/by-date/${d}`, { params: { model_id: model.id } });
+      setAllocs(res.data.filter(a => ids.has(a.gridcell_id) && (!t || a.trade_id === Number(t))));
+    };
+    // The stream starts with a resync, so every (re)connect refetches what was missed.
+    const open = () => {
+      const token = encodeURIComponent(localStorage.getItem("token") || "");
+      es = new EventSource(`${client.defaults.baseURL}/changes/${model.id}?token=${token}`);
+      es.addEventListener("allocation_created", onAllocation);
+      es.addEventListener("allocation_deleted", onAllocation);
+      es.addEventListener("cell_capacity_changed", (e) => setCells(prev => applyCellCapacityEvent(prev, JSON.parse(e.data))));
+      ["grid_regenerated", "scenario_promoted", "bulk_import", "resync"].forEach(t => es.addEventListener(t, resync));
+      // EventSource retries network errors itself but gives up on an HTTP error such as
+      // a 401 once the token in the URL expires; reopen with the current token.
+      es.onerror = () => {
+        if (es.readyState === EventSource.CLOSED) reopenTimer = setTimeout(open, 3000);
+      };
+    };
+    open();
+    return () => {
+      clearTimeout(reopenTimer);
+      es.close();
+    };
+  }, [model]);
+
   const [sections, setSections] = useState({ x: 6, y: 3, z: 3, cap: 8 });
 
   const regen = async () => {
@@ -163,14 +201,14 @@ export default function ModelView() {
       end_date: formData.end_date || null,
       num_workers: Number(formData.num_workers)
     });
-    const res = await client.get(`/allocations/by-date/${date}`);
+    const res = await client.get(`/allocations/by-date/${date}`, { params: { model_id: id } });
     setAllocs(res.data.filter(a => cells.some(c => c.id === a.gridcell_id)));
     setShowForm(false);
   };
 
   const deleteAllocation = async (allocId) => {
     await client.delete(`/allocations/${allocId}`);
-    const res = await client.get(`/allocations/by-date/${date}`);
+    const res = await client.get(`/allocations/by-date/${date}`, { params: { model_id: id } });
     setAllocs(res.data.filter(a => cells.some(c => c.id === a.gridcell_id)));
   };
 
@@ -0,0 +1,28 @@
+import { describe, it, expect } from "vitest";
+import { applyAllocationEvent, applyCellCapacityEvent } from "../utils/changeFeed.js";
+
+describe("applyAllocationEvent", () => {
+  const ctx = { date: "2025-01-02", tradeId: "", cellIds: new Set([1]) };
+
+  it("adds allocations active on the viewed date and removes deleted ones", () => {
+    const a = { id: 7, gridcell_id: 1, trade_id: 2, work_date: "2025-01-01", end_date: "2025-01-05", num_workers: 3 };
+    const added = applyAllocationEvent([], { type: "allocation_created", allocation: a }, ctx);
+    expect(added).toEqual([a]);
+    expect(applyAllocationEvent(added, { type: "allocation_deleted", allocation: a }, ctx)).toEqual([]);
+  });
+
+  it("ignores allocations outside the date or model", () => {
+    const later = { id: 8, gridcell_id: 1, trade_id: 2, work_date: "2025-02-01", end_date: null };
+    const other = { id: 9, gridcell_id: 5, trade_id: 2, work_date: "2025-01-01", end_date: null };
+    expect(applyAllocationEvent([], { type: "allocation_created", allocation: later }, ctx)).toEqual([]);
+    expect(applyAllocationEvent([], { type: "allocation_created", allocation: other }, ctx)).toEqual([]);
+  });
+});
+
+describe("applyCellCapacityEvent", () => {
+  it("updates the changed cell only", () => {
+    const cells = [{ id: 1, total_capacity: 5 }, { id: 2, total_capacity: 5 }];
+    const res = applyCellCapacityEvent(cells, { gridcell_id: 2, total_capacity: 9 });
+    expect(res.map(c => c.total_capacity)).toEqual([5, 9]);
+  });
+});
@@ -0,0 +1,17 @@
+export function isActiveOn(a, date) {
+  return a.work_date <= date && (!a.end_date || a.end_date >= date);
+}
+
+export function applyAllocationEvent(allocs, event, { date, tradeId, cellIds }) {
+  const a = event.allocation;
+  if (event.type === "allocation_deleted") return allocs.filter(x => x.id !== a.id);
+  if (event.type !== "allocation_created") return allocs;
+  if (!cellIds.has(a.gridcell_id) || !isActiveOn(a, date)) return allocs;
+  if (tradeId && a.trade_id !== Number(tradeId)) return allocs;
+  if (allocs.some(x => x.id === a.id)) return allocs;
+  return [...allocs, a];
+}
+
+export function applyCellCapacityEvent(cells, event) {
+  return cells.map(c => c.id === event.gridcell_id ? { ...c, total_capacity: event.total_capacity } : c);
+}